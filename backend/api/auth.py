@@ -2,14 +2,17 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import timedelta
 from core.config import settings
+from core.database import run_in_db
 from core.security import (
-    verify_password,
-    get_password_hash,
+    hash_password,
+    verify_and_update_password,
+    invalidate_cached_user,
     create_access_token,
     get_current_user,
 )
 from schemas.auth import Token, UserCreate, UserResponse, UserLogin
 from models.user import User
+from services.repository import get_repository
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -28,19 +31,20 @@ async def options_login():
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate):
     # Check if user exists
-    existing_user = User.nodes.first_or_none(email=user_data.email)
+    existing_user = await run_in_db(get_repository().get_user_by_email, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     user = User(
         username=user_data.username,
         email=user_data.email,
         hashed_password=hashed_password,
-    ).save()
+    )
+    await run_in_db(get_repository().save_user, user)
 
     return UserResponse(
         uid=user.uid,
@@ -52,14 +56,25 @@ async def register(user_data: UserCreate):
 
 @router.post("/login", response_model=Token)
 async def login(user_data: UserLogin):
-    user = User.nodes.first_or_none(email=user_data.email)
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    user = await run_in_db(get_repository().get_user_by_email, user_data.email)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(
+            user_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Rehash with the configured cost factor if it has changed
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_db(get_repository().save_user, user)
+        invalidate_cached_user(user.email)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -0,0 +1,56 @@
+import hashlib
+import re
+from typing import Iterable, Optional
+
+from fastapi import Response, status
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def character_etag(character) -> str:
+    """'"v{version}-{digest}"' so If-Match can be checked against the version"""
+    digest = make_etag("character", character.uid, character.updated_at).strip('"')
+    return f'"v{character.version or 0}-{digest}"'
+
+
+def etag_version(if_match: Optional[str]) -> Optional[int]:
+    """
+    Version named by an If-Match header: None when the header is absent or
+    "*", -1 when it does not name a version (and so can never match).
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    match = re.match(r'^(?:W/)?"v(\d+)-', if_match.strip())
+    return int(match.group(1)) if match else -1
+
+
+def characters_etag(characters: Iterable) -> str:
+    return make_etag(
+        "characters",
+        *sorted(f"{character.uid}:{character.updated_at}" for character in characters),
+    )
+
+
+def monster_etag(monster) -> str:
+    return make_etag("monster", monster.uid, monster.updated_at)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -1,5 +1,12 @@
 from fastapi import APIRouter
-from .routes import users, characters, monsters, image_generation, image_upload
+from .routes import (
+    users,
+    characters,
+    monsters,
+    image_generation,
+    image_upload,
+    metrics,
+)
 from .auth import router as auth_router
 
 router = APIRouter()
@@ -18,3 +25,4 @@ router.include_router(characters.router)
 router.include_router(monsters.router)
 router.include_router(image_generation.router)
 router.include_router(image_upload.router)
+router.include_router(metrics.router)
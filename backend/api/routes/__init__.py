@@ -1,3 +1,10 @@
-from . import users, characters, monsters, image_generation, image_upload
+from . import users, characters, monsters, image_generation, image_upload, metrics
 
-__all__ = ["users", "characters", "monsters", "image_generation", "image_upload"]
+__all__ = [
+    "users",
+    "characters",
+    "monsters",
+    "image_generation",
+    "image_upload",
+    "metrics",
+]
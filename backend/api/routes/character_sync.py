@@ -0,0 +1,78 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from api.routes.chat_rooms import get_current_user_ws
+from core.config import settings
+from core.database import run_in_db
+from services.character_service import CharacterService
+from services.character_sync import character_sync
+from services.connection_manager import (
+    PONG_FRAME,
+    OutboundMessage,
+    encode_message,
+    receive_payload,
+)
+
+router = APIRouter()
+
+
+@router.websocket("/ws/characters")
+async def character_sync_endpoint(websocket: WebSocket):
+    """
+    Live character updates. Clients send:
+
+    - {"type": "subscribe", "uids": [...]}: owned characters only; each gets
+      a snapshot, then {"type": "patch", "version": n, "ops": [...]}
+    - {"type": "unsubscribe", "uids": [...]}
+    - {"type": "resync", "uid": ...}: fresh snapshot after a version gap
+    """
+    user = await get_current_user_ws(websocket)
+    if not user:
+        return
+
+    await websocket.accept()
+    connection = character_sync.open(websocket, user)
+    try:
+        while True:
+            data = await receive_payload(websocket)
+            connection.touch()
+            kind = data.get("type")
+            if kind == "subscribe":
+                await subscribe(connection, [str(uid) for uid in data.get("uids", [])])
+            elif kind == "unsubscribe":
+                for uid in data.get("uids", []):
+                    await character_sync.unsubscribe(connection, str(uid))
+            elif kind == "resync":
+                character_sync.send_snapshot(connection, str(data.get("uid")))
+            elif kind == "ping":
+                connection.enqueue(PONG_FRAME)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        character_sync.remove(connection)
+
+
+async def subscribe(connection, uids):
+    current = character_sync.subscriptions.get(connection, set())
+    room = settings.CHARACTER_SYNC_MAX_SUBSCRIPTIONS - len(current)
+    uids = [uid for uid in dict.fromkeys(uids) if uid not in current][: max(room, 0)]
+    if not uids:
+        return
+
+    characters = await run_in_db(
+        CharacterService.get_owned_characters, uids, connection.user
+    )
+    for character in characters:
+        await character_sync.subscribe(connection, character)
+
+    denied = sorted(set(uids) - {character.uid for character in characters})
+    if denied:
+        connection.enqueue(
+            OutboundMessage(
+                encode_message(
+                    {
+                        "type": "error",
+                        "uids": denied,
+                        "message": "Not authorized to access these characters",
+                    }
+                )
+            )
+        )
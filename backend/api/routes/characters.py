@@ -1,13 +1,39 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Depends
+import os
+import uuid
+from typing import List, Optional
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    status,
+    Depends,
+    Header,
+    Request,
+    Response,
+)
 from services.character_service import CharacterService
+from services.character_sync import character_sync
+from services.hp_write_buffer import hp_buffer
 from schemas.character import (
     CharacterCreate,
     CharacterUpdate,
     CharacterResponse,
     CharacterStatsResponse,
+    CharacterStatsBatchRequest,
 )
+from models.character import Character
 from models.user import User
 from api.auth import get_current_user
+from api.etag import (
+    character_etag,
+    characters_etag,
+    etag_matches,
+    etag_version,
+    not_modified,
+)
+from core.database import run_in_db
+from core.uploads import receive_files, upload_request_body
+from services.repository import get_repository
+from services.stats_engine import compute_stats_batch
 
 router = APIRouter(
     prefix="/characters",
@@ -20,6 +46,31 @@ def get_character_service():
     return CharacterService()
 
 
+async def get_owned_character(
+    uid: str, current_user: User = Depends(get_current_user)
+) -> Character:
+    """
+    Resolve the character from the path and check ownership in a single query.
+
+    Raises 404 if the character does not exist and 403 if the current user
+    does not own it.
+    """
+    exists, character = await run_in_db(
+        CharacterService.get_owned_character, uid, current_user
+    )
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Character with uid {uid} not found",
+        )
+    if character is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this character",
+        )
+    return character
+
+
 @router.post(
     "/",
     response_model=CharacterResponse,
@@ -45,8 +96,10 @@ async def create_character(
     character_data["experience"] = character_data.get("experience", 0)
     character_data["level"] = character_data.get("level", 1)
 
-    created_character = character_service.create_character(
-        character_data=character_data, user=current_user
+    created_character = await run_in_db(
+        character_service.create_character,
+        character_data=character_data,
+        user=current_user,
     )
 
     return CharacterResponse.from_orm(created_character)
@@ -57,18 +110,25 @@ async def create_character(
     response_model=list[CharacterResponse],
 )
 async def get_my_characters(
+    response: Response,
     current_user: User = Depends(get_current_user),
     character_service: CharacterService = Depends(get_character_service),
+    if_none_match: Optional[str] = Header(None),
 ):
     """Get all characters owned by the current user"""
-    characters = character_service.get_user_characters(current_user)
+    characters = await run_in_db(character_service.get_user_characters, current_user)
+
+    etag = characters_etag(characters)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
 
     # Process each character to ensure experience exists
     for character in characters:
         if not hasattr(character, "experience"):
             character.experience = 0
             character.level = 1
-            character.save()
+            await run_in_db(get_repository().save_character, character)
 
     return [CharacterResponse.from_orm(char) for char in characters]
 
@@ -77,28 +137,22 @@ async def get_my_characters(
     "/{uid}",
     response_model=CharacterStatsResponse,
 )
-async def get_character(uid: str, current_user: User = Depends(get_current_user)):
+async def get_character(
+    response: Response,
+    character: Character = Depends(get_owned_character),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get a specific character by ID with full stats and icon
     """
-    try:
-        # First check if character exists
-        character = CharacterService.get_character(uid)
-        if not character:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Character with uid {uid} not found",
-            )
+    etag = character_etag(character)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
 
-        # Check ownership
-        if not CharacterService.is_owner(character, current_user):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view this character",
-            )
-
-        # Get full stats
-        stats = CharacterService.get_character_with_full_stats(uid)
+    try:
+        # Compute full stats from the loaded node
+        stats = CharacterService.build_full_stats(character)
 
         # Ensure we have all required fields for CharacterStatsResponse
         required_fields = [
@@ -136,14 +190,16 @@ async def get_character(uid: str, current_user: User = Depends(get_current_user)
 
 @router.patch(
     "/{uid}/images",
+    response_model=CharacterResponse,
     summary="Update character images",
     description="Update a character's full image and/or icon",
+    openapi_extra=upload_request_body("image", "icon"),
 )
 async def update_character_images(
-    uid: str,
-    image: UploadFile = File(None),
-    icon: UploadFile = File(None),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    character: Character = Depends(get_owned_character),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update character images:
@@ -151,17 +207,37 @@ async def update_character_images(
     - **uid**: Character's unique identifier
     - **image**: Full character image file (optional)
     - **icon**: Character icon file (optional)
+
+    Send the character's ETag as If-Match to get a 409 instead of
+    overwriting a change made since it was read.
     """
-    character = CharacterService.get_character(uid)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
 
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
+    def destination_for(field: str, filename: str, content_type: str) -> str:
+        if not content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{field} must be an image",
+            )
+        extension = os.path.splitext(filename)[1]
+        name = f"{character.uid}_{field}_{uuid.uuid4().hex[:8]}{extension}"
+        return os.path.join("media/characters", name)
+
+    files = await receive_files(request, destination_for, fields=("image", "icon"))
+    if not files:
         raise HTTPException(
-            status_code=403, detail="Not authorized to modify this character"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Send an image and/or an icon file",
         )
-
-    return character.update_images(image_file=image, icon_file=icon)
+    paths = {
+        f"{field}_path": os.path.relpath(received.path, "media")
+        for field, received in files.items()
+    }
+    updated_character = await run_in_db(
+        CharacterService.update_images, character, paths, etag_version(if_match)
+    )
+    await character_sync.publish(updated_character)
+    response.headers["ETag"] = character_etag(updated_character)
+    return updated_character.to_dict()
 
 
 @router.put(
@@ -171,28 +247,28 @@ async def update_character_images(
     description="Update a specific character's information",
 )
 async def update_character(
-    uid: str,
     character_data: CharacterUpdate,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    character: Character = Depends(get_owned_character),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update character information:
 
     - **uid**: Character's unique identifier
     - **character_data**: Updated character information
-    """
-    character = CharacterService.get_character(uid)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
 
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to modify this character"
-        )
-
-    updated_character = CharacterService.update_character(uid, character_data)
-    if not updated_character:
-        raise HTTPException(status_code=404, detail="Character not found")
+    Send the character's ETag as If-Match to get a 409 instead of
+    overwriting a change made since it was read.
+    """
+    updated_character = await run_in_db(
+        CharacterService.apply_character_update,
+        character,
+        character_data,
+        etag_version(if_match),
+    )
+    await character_sync.publish(updated_character)
+    response.headers["ETag"] = character_etag(updated_character)
     return updated_character.to_dict()
 
 
@@ -202,125 +278,79 @@ async def update_character(
     summary="Delete character",
     description="Delete a specific character",
 )
-async def delete_character(uid: str, current_user: User = Depends(get_current_user)):
+async def delete_character(character: Character = Depends(get_owned_character)):
     """
     Delete a character:
 
     - **uid**: Unique identifier of the character to delete
     """
-    character = CharacterService.get_character(uid)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to delete this character"
-        )
-
-    if not CharacterService.delete_character(uid):
-        raise HTTPException(status_code=404, detail="Character not found")
+    await run_in_db(get_repository().delete_character, character)
+    hp_buffer.discard(character.uid)
+    CharacterService.invalidate_stats(character.uid)
 
 
 @router.post(
-    "/{character_id}/spells/{spell_name}",
+    "/{uid}/spells/{spell_name}",
     summary="Add spell to character",
     description="Add a spell to a character's spellbook",
 )
 async def add_spell_to_character(
-    character_id: str, spell_name: str, current_user: User = Depends(get_current_user)
+    spell_name: str, character: Character = Depends(get_owned_character)
 ):
     """
     Add a spell to a character's spellbook
 
-    - **character_id**: Character's unique identifier
+    - **uid**: Character's unique identifier
     - **spell_name**: Name of the spell to add
     """
-    character = CharacterService.get_character(character_id)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to modify this character"
-        )
-
-    return CharacterService.add_spell(character_id, spell_name)
+    return await run_in_db(CharacterService.add_spell, character.uid, spell_name)
 
 
 @router.post(
-    "/{character_id}/features/{feature_name}",
+    "/{uid}/features/{feature_name}",
     summary="Add feature to character",
     description="Add a feature to a character",
 )
 async def add_feature_to_character(
-    character_id: str, feature_name: str, current_user: User = Depends(get_current_user)
+    feature_name: str, character: Character = Depends(get_owned_character)
 ):
     """
     Add a feature to a character
 
-    - **character_id**: Character's unique identifier
+    - **uid**: Character's unique identifier
     - **feature_name**: Name of the feature to add
     """
-    character = CharacterService.get_character(character_id)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to modify this character"
-        )
-
-    return CharacterService.add_feature(character_id, feature_name)
+    return await run_in_db(CharacterService.add_feature, character.uid, feature_name)
 
 
 @router.get(
-    "/{character_id}/spells",
+    "/{uid}/spells",
     summary="Get character spells",
     description="Get all spells known by a character",
 )
-async def get_character_spells(
-    character_id: str, current_user: User = Depends(get_current_user)
-):
+async def get_character_spells(character: Character = Depends(get_owned_character)):
     """
     Get all spells known by a character
 
-    - **character_id**: Character's unique identifier
+    - **uid**: Character's unique identifier
     """
-    character = CharacterService.get_character(character_id)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to view this character"
-        )
-
-    return character.spells.all()
+    return await run_in_db(character.spells.all)
 
 
 @router.get(
-    "/{character_id}/features",
+    "/{uid}/features",
     summary="Get character features",
     description="Get all features of a character",
 )
 async def get_character_features(
-    character_id: str, current_user: User = Depends(get_current_user)
+    character: Character = Depends(get_owned_character),
 ):
     """
     Get all features of a character
 
-    - **character_id**: Character's unique identifier
+    - **uid**: Character's unique identifier
     """
-    character = CharacterService.get_character(character_id)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to view this character"
-        )
-
-    return character.features.all()
+    return await run_in_db(character.features.all)
 
 
 @router.get(
@@ -329,7 +359,11 @@ async def get_character_features(
     summary="Get character stats",
     description="Get detailed statistics for a character",
 )
-async def get_character_stats(uid: str, current_user: User = Depends(get_current_user)):
+async def get_character_stats(
+    response: Response,
+    character: Character = Depends(get_owned_character),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get detailed character statistics including:
     - Base ability scores
@@ -337,21 +371,20 @@ async def get_character_stats(uid: str, current_user: User = Depends(get_current
     - Derived stats (AC, HP, etc.)
     - Saving throw proficiencies
     - Skill proficiencies and their associated ability scores
-    """
-    character = CharacterService.get_character(uid)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
 
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to view this character"
-        )
+    Supports If-None-Match: returns 304 without recomputing stats when the
+    ETag still matches.
+    """
+    etag = character_etag(character)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
 
     # Get base stats
-    stats = CharacterService.get_character_stats(uid)
+    stats = CharacterService.get_cached_stats(character)
 
     # Add character icon if it exists
-    stats["icon"] = character.icon if hasattr(character, "icon") else None
+    stats["icon"] = character.icon_path or None
 
     # Define skill to ability score mappings
     skill_ability_mappings = {
@@ -375,15 +408,42 @@ async def get_character_stats(uid: str, current_user: User = Depends(get_current
         "survival": "WISDOM",
     }
 
-    # Update each skill with its associated ability score
+    # Update each skill with its associated ability score (copying the
+    # nested dicts, which are shared with the stats cache)
     if "skills" in stats:
-        for skill_name, skill_data in stats["skills"].items():
-            if skill_name in skill_ability_mappings:
-                stats["skills"][skill_name]["stat"] = skill_ability_mappings[skill_name]
+        stats["skills"] = {
+            skill_name: (
+                {**skill_data, "stat": skill_ability_mappings[skill_name]}
+                if skill_name in skill_ability_mappings
+                else skill_data
+            )
+            for skill_name, skill_data in stats["skills"].items()
+        }
 
     return stats
 
 
+@router.post(
+    "/stats:batch",
+    response_model=List[CharacterStatsResponse],
+    summary="Get stats for many characters",
+    description="Compute stats for several characters in one vectorized pass",
+)
+async def get_character_stats_batch(
+    request: CharacterStatsBatchRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get stats for a party or DM screen in one request
+
+    - **uids**: Character uids; characters the user does not own are skipped
+    """
+    characters = await run_in_db(
+        CharacterService.get_owned_characters, request.uids, current_user
+    )
+    return compute_stats_batch(characters)
+
+
 @router.patch(
     "/{uid}/stats",
     response_model=CharacterResponse,
@@ -391,27 +451,41 @@ async def get_character_stats(uid: str, current_user: User = Depends(get_current
     description="Update statistics for a character",
 )
 async def update_character_stats(
-    uid: str, stats_data: dict, current_user: User = Depends(get_current_user)
+    stats_data: dict,
+    response: Response,
+    character: Character = Depends(get_owned_character),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update character statistics:
     - Base ability scores
     - Saving throw proficiencies
     - Skill proficiencies
-    """
-    character = CharacterService.get_character(uid)
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
 
-    if not any(rel.end_node.uid == current_user.uid for rel in character.owner):
-        raise HTTPException(
-            status_code=403, detail="Not authorized to modify this character"
+    Updates that only change current_hit_points and/or temp_hit_points are
+    buffered and written to the database in batches shortly afterwards.
+    With If-Match, a stale ETag is answered with 409.
+    """
+    expected_version = etag_version(if_match)
+    if hp_buffer.accepts(stats_data) and expected_version in (
+        None,
+        character.version or 0,
+    ):
+        updated_character = hp_buffer.write(character, stats_data)
+        CharacterService.invalidate_stats(character.uid)
+    else:
+        updated_character = await run_in_db(
+            CharacterService.apply_stats_update,
+            character,
+            stats_data,
+            expected_version,
         )
-
-    return CharacterService.update_character_stats(uid, stats_data)
+    await character_sync.publish(updated_character)
+    response.headers["ETag"] = character_etag(updated_character)
+    return updated_character
 
 
 @router.get("/{uid}/debug", include_in_schema=False)
 async def debug_character(uid: str, current_user: User = Depends(get_current_user)):
     """Debug endpoint to check character data"""
-    return CharacterService.debug_character(uid)
+    return await run_in_db(CharacterService.debug_character, uid)
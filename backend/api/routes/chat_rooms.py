@@ -1,8 +1,21 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
-from typing import Dict, Set
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
 from jose import JWTError, jwt
 from core.config import settings
+from core.security import get_current_user, get_user_by_subject
 from models.user import User
+from schemas.chat import ChatHistoryPage
+from services.chat_log import list_room_messages, record_message
+from services.connection_manager import (
+    PONG_FRAME,
+    ClientConnection,
+    OutboundMessage,
+    encode_message,
+    manager,
+    receive_payload,
+)
+from services.dice_service import DiceError, DiceService
 
 router = APIRouter()
 
@@ -26,7 +39,7 @@ async def get_current_user_ws(websocket: WebSocket) -> User:
             return None
 
         # Get user from database
-        user = User.nodes.first_or_none(email=email)
+        user = await get_user_by_subject(email)
         if user is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return None
@@ -38,47 +51,28 @@ async def get_current_user_ws(websocket: WebSocket) -> User:
         return None
 
 
-# Store active connections
-class ConnectionManager:
-    def __init__(self):
-        # Dict to store room_id -> set of websocket connections
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        # Dict to store websocket -> user mapping
-        self.socket_user_map: Dict[WebSocket, User] = {}
-
-    async def connect(self, websocket: WebSocket, room_id: str, user: User):
-        await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = set()
-        self.active_connections[room_id].add(websocket)
-        self.socket_user_map[websocket] = user
-        # Notify others that user joined
-        await self.broadcast(
-            {
-                "user": "system",
-                "message": f"User {user.email} joined the chat",
-                "timestamp": None,
-            },
-            room_id,
-            websocket,
+async def handle_roll(connection: ClientConnection, expression: str, timestamp):
+    """Evaluate a /roll command and broadcast the result to the whole room"""
+    user = connection.user
+    try:
+        result = DiceService.roll(expression)
+    except DiceError as e:
+        # Only the roller hears about a bad expression
+        connection.enqueue(
+            OutboundMessage(encode_message({"type": "error", "message": str(e)}))
         )
-
-    def disconnect(self, websocket: WebSocket, room_id: str):
-        if room_id in self.active_connections:
-            self.active_connections[room_id].remove(websocket)
-            if len(self.active_connections[room_id]) == 0:
-                del self.active_connections[room_id]
-        if websocket in self.socket_user_map:
-            del self.socket_user_map[websocket]
-
-    async def broadcast(self, message: dict, room_id: str, sender_socket: WebSocket):
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                if connection != sender_socket:  # Don't send back to sender
-                    await connection.send_json(message)
-
-
-manager = ConnectionManager()
+        return
+    record_message(
+        connection.room_id,
+        user.email,
+        f"/roll {result['expression']} = {result['total']}",
+    )
+    # Sent to the roller too, so everyone sees the same server-side result
+    await manager.broadcast(
+        {"type": "roll", "user": user.email, **result, "timestamp": timestamp},
+        connection.room_id,
+        history=True,
+    )
 
 
 @router.websocket("/ws/chat/{room_id}")
@@ -87,20 +81,47 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
     if not user:
         return
 
-    await manager.connect(websocket, room_id, user)
+    connection = await manager.connect(
+        websocket,
+        room_id,
+        user,
+        encoding=websocket.query_params.get("encoding", "json"),
+        coalesce=websocket.query_params.get("coalesce") in ("1", "true"),
+    )
+    if connection is None:
+        return
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await receive_payload(websocket)
+            connection.touch()
+            if data.get("type") == "pong":
+                continue
+            if data.get("type") == "ping":
+                connection.enqueue(PONG_FRAME)
+                continue
+            text = data.get("message")
+            parts = text.split(maxsplit=1) if isinstance(text, str) else []
+            if parts[:1] == ["/roll"]:
+                await handle_roll(
+                    connection,
+                    parts[1] if len(parts) > 1 else "",
+                    data.get("timestamp"),
+                )
+                continue
             # Create message format
             message = {
                 "user": user.email,
                 "message": data.get("message"),
                 "timestamp": data.get("timestamp"),
             }
+            record_message(room_id, user.email, message["message"])
             # Broadcast message to all users in the room
-            await manager.broadcast(message, room_id, websocket)
+            await manager.broadcast(message, room_id, websocket, history=True)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, room_id)
+        pass
+    finally:
+        # Also reached when the socket was reaped or errored out
+        manager.remove(connection)
         # Notify other users about disconnection
         await manager.broadcast(
             {
@@ -111,3 +132,25 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
             room_id,
             websocket,
         )
+
+
+@router.get("/chat/rooms/{room_id}/messages", response_model=ChatHistoryPage)
+async def get_room_messages(
+    room_id: str,
+    before: Optional[datetime] = None,
+    before_uid: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Page backwards through a room's history, oldest message first.
+    Pass next_before and next_before_uid from the response as before and
+    before_uid to fetch the previous page.
+    """
+    messages = await list_room_messages(room_id, before, limit, before_uid)
+    more = len(messages) == limit
+    return {
+        "messages": [message.to_dict() for message in messages],
+        "next_before": messages[0].timestamp if more else None,
+        "next_before_uid": messages[0].uid if more else None,
+    }
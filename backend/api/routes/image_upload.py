@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.responses import JSONResponse
 import os
 import uuid
 from datetime import datetime
+from core.uploads import receive_files, upload_request_body
 from models.user import User
 from ..auth import get_current_user
 from typing import Optional
@@ -20,9 +21,13 @@ class ImageUploadResponse(BaseModel):
     image_path: str
 
 
-@router.post("/", response_model=ImageUploadResponse)
+@router.post(
+    "/",
+    response_model=ImageUploadResponse,
+    openapi_extra=upload_request_body("file"),
+)
 async def upload_image(
-    file: UploadFile = File(...),
+    request: Request,
     character_id: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ):
@@ -30,46 +35,51 @@ async def upload_image(
     Upload an image and return its path
 
     Args:
-        file: The image file to upload
+        file: The image file to upload (multipart form field)
         character_id: Optional character ID if the image is for a character
         current_user: The authenticated user
 
     Returns:
         dict: Contains success message and the relative path to the saved image
     """
-    try:
-        # Validate file type
-        if not file.content_type.startswith("image/"):
+    # Determine save path based on whether it's for a character
+    if character_id:
+        save_dir = "media/characters"
+        relative_dir = "characters"
+    else:
+        save_dir = "media/uploads"
+        relative_dir = "uploads"
+
+    def destination_for(field: str, filename: str, content_type: str) -> str:
+        # Validate file type before any of its content is read
+        if not content_type.startswith("image/"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an image"
             )
 
         # Create unique filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename)[1]
-        filename = f"uploaded_{timestamp}_{uuid.uuid4().hex[:8]}{file_extension}"
-
-        # Determine save path based on whether it's for a character
-        if character_id:
-            save_dir = "media/characters"
-            relative_path = f"characters/{filename}"
-        else:
-            save_dir = "media/uploads"
-            relative_path = f"uploads/{filename}"
+        file_extension = os.path.splitext(filename)[1]
+        unique_name = f"uploaded_{timestamp}_{uuid.uuid4().hex[:8]}{file_extension}"
+        return os.path.join(save_dir, unique_name)
 
-        # Ensure directory exists
-        os.makedirs(save_dir, exist_ok=True)
-
-        # Save the image
-        file_path = os.path.join(save_dir, filename)
-        with open(file_path, "wb") as f:
-            contents = await file.read()
-            f.write(contents)
+    try:
+        # Stream the image to disk; rejects files over UPLOAD_MAX_BYTES
+        files = await receive_files(request, destination_for, fields=("file",))
+        if "file" not in files:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="An image file is required",
+            )
 
+        filename = os.path.basename(files["file"].path)
         return ImageUploadResponse(
-            message="Image uploaded successfully", image_path=relative_path
+            message="Image uploaded successfully",
+            image_path=f"{relative_dir}/{filename}",
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
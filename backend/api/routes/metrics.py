@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from core.metrics import collect_metrics
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+)
+
+
+@router.get(
+    "/",
+    summary="Get runtime metrics",
+    description="Cache counters and other process-local runtime metrics",
+)
+async def get_metrics():
+    """
+    Returns metrics for this worker process only
+    """
+    return collect_metrics()
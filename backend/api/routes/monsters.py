@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Response
 from services.monster_service import MonsterService
 from schemas.monster import MonsterCreate, MonsterUpdate, MonsterResponse
 from models.user import User
+from core.database import run_in_db
 from api.auth import get_current_user
+from api.etag import etag_matches, monster_etag, not_modified
 
 router = APIRouter(
     prefix="/monsters",
@@ -21,7 +24,7 @@ async def create_monster(
 ):
     try:
         monster_dict = monster_data.dict(exclude_unset=True)
-        monster = MonsterService.create_monster(monster_dict)
+        monster = await run_in_db(MonsterService.create_monster, monster_dict)
         return monster.to_dict()
     except Exception as e:
         raise HTTPException(
@@ -34,12 +37,22 @@ async def create_monster(
     "/{uid}",
     response_model=MonsterResponse,
 )
-async def get_monster(uid: str, current_user: User = Depends(get_current_user)):
-    monster = MonsterService.get_monster(uid)
+async def get_monster(
+    uid: str,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    monster = await run_in_db(MonsterService.get_monster, uid)
     if not monster:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Monster not found"
         )
+
+    etag = monster_etag(monster)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return monster.to_dict()
 
 
@@ -52,7 +65,7 @@ async def update_monster(
     monster_data: MonsterUpdate,
     current_user: User = Depends(get_current_user),
 ):
-    updated_monster = MonsterService.update_monster(uid, monster_data)
+    updated_monster = await run_in_db(MonsterService.update_monster, uid, monster_data)
     if not updated_monster:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Monster not found"
@@ -65,7 +78,7 @@ async def update_monster(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def delete_monster(uid: str, current_user: User = Depends(get_current_user)):
-    if not MonsterService.delete_monster(uid):
+    if not await run_in_db(MonsterService.delete_monster, uid):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Monster not found"
         )
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from services.user_service import UserService
 from schemas.user import UserSchema, UserCreate, UserUpdate
 from models.user import User
 from api.auth import get_current_user
+from core.database import run_in_db
+from core.uploads import receive_files, upload_request_body
+from services.hp_write_buffer import hp_buffer
+from services.repository import get_repository
 
 router = APIRouter(
     prefix="/users",
@@ -39,23 +43,39 @@ async def get_my_characters(current_user: User = Depends(get_current_user)):
     """
     Retrieves all characters associated with the currently authenticated user
     """
-    return current_user.characters.all()
+    characters = await run_in_db(
+        get_repository().list_user_characters, current_user.uid
+    )
+    return hp_buffer.overlay_all(characters)
 
 
 @router.patch(
     "/me/avatar",
+    response_model=UserSchema,
     summary="Update user avatar",
     description="Upload or update the current user's profile avatar",
+    openapi_extra=upload_request_body("avatar"),
 )
 async def update_user_avatar(
-    avatar: UploadFile = File(...), current_user: User = Depends(get_current_user)
+    request: Request, current_user: User = Depends(get_current_user)
 ):
     """
     Update the current user's profile avatar
 
     - **avatar**: Image file to use as profile avatar
     """
-    return current_user.update_profile(avatar_file=avatar)
+    files = await receive_files(
+        request,
+        lambda field, filename, content_type: current_user.avatar_path_for(filename),
+        fields=("avatar",),
+    )
+    if "avatar" not in files:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="An avatar file is required",
+        )
+    await run_in_db(current_user.update_profile, avatar_path=files["avatar"].path)
+    return await run_in_db(get_repository().save_user, current_user)
 
 
 @router.get(
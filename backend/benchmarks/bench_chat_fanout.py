@@ -0,0 +1,131 @@
+"""
+Chat fan-out latency with a room of 200 sockets: the old sequential
+broadcast (send_json on each socket in turn) versus the queued
+ConnectionManager with one writer task per connection.
+
+Each socket write takes --send-ms; a few sockets are slow (--slow-ms).
+Latency is measured from the broadcast call to delivery on every fast socket.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chat_fanout
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from models.user import User
+from services.connection_manager import ConnectionManager
+
+
+class BenchSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.latencies = []
+
+    async def accept(self):
+        pass
+
+    async def _deliver(self, message: dict):
+        await asyncio.sleep(self.delay)
+        self.latencies.append((time.perf_counter() - message["sent_at"]) * 1000)
+
+    async def send_json(self, message: dict):
+        await self._deliver(message)
+
+    async def send_text(self, text: str):
+        await self._deliver(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_sockets(args) -> list:
+    slow_every = args.sockets // args.slow if args.slow else 0
+    return [
+        BenchSocket(
+            args.slow_ms / 1000
+            if slow_every and i % slow_every == 0
+            else args.send_ms / 1000
+        )
+        for i in range(args.sockets)
+    ]
+
+
+async def sequential(sockets: list, messages: int, interval: float):
+    for i in range(messages):
+        message = {"message": i, "sent_at": time.perf_counter()}
+        for websocket in sockets:
+            await websocket.send_json(message)
+        await asyncio.sleep(interval)
+
+
+async def queued(sockets: list, messages: int, interval: float):
+    manager = ConnectionManager()
+    for i, websocket in enumerate(sockets):
+        user = User(uid=f"u{i}", username=f"u{i}", email=f"u{i}@example.com")
+        await manager.connect(websocket, "bench", user)
+    for websocket in sockets:
+        websocket.latencies.clear()
+    for i in range(messages):
+        await manager.broadcast({"message": i, "sent_at": time.perf_counter()}, "bench")
+        await asyncio.sleep(interval)
+    # Let the writers drain
+    while any(c.queue.qsize() for c in manager.active_connections["bench"].values()):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(max(s.delay for s in sockets) * 2)
+    return manager
+
+
+def summarize(label: str, sockets: list, args, elapsed: float, extra: str = ""):
+    latencies = [
+        latency
+        for websocket in sockets
+        if websocket.delay == args.send_ms / 1000
+        for latency in websocket.latencies
+    ]
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    print(
+        f"{label:12} p50={statistics.median(latencies):8.1f} ms  p99={p99:8.1f} ms  "
+        f"max={latencies[-1]:8.1f} ms  total={elapsed:6.2f} s{extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    parser.add_argument("--send-ms", type=float, default=0.2)
+    parser.add_argument("--slow", type=int, default=2)
+    parser.add_argument("--slow-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.sockets} sockets/room, {args.slow} slow ({args.slow_ms} ms/frame), "
+        f"{args.messages} messages every {args.interval_ms} ms"
+    )
+    interval = args.interval_ms / 1000
+
+    sockets = make_sockets(args)
+    start = time.perf_counter()
+    asyncio.run(sequential(sockets, args.messages, interval))
+    summarize("sequential", sockets, args, time.perf_counter() - start)
+
+    sockets = make_sockets(args)
+    start = time.perf_counter()
+    manager = asyncio.run(queued(sockets, args.messages, interval))
+    summarize(
+        "queued",
+        sockets,
+        args,
+        time.perf_counter() - start,
+        f"  slow dropped={manager.slow_consumers_dropped}",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Frames and bytes on the wire for a busy chat room: plain JSON frames (the
+current behaviour) versus per-tick coalescing and MessagePack encoding.
+
+A generator pushes a mix of chat, typing and dice-roll messages into one
+room. Deflated bytes approximate permessage-deflate with context takeover
+(one zlib stream per socket, sync-flushed per frame).
+
+Run from the backend directory:
+    python -m benchmarks.bench_chat_wire
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import zlib
+
+from models.user import User
+from services.connection_manager import SUPPORTED_ENCODINGS, ConnectionManager
+
+
+class WireSocket:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.deflated = 0
+        self._zlib = zlib.compressobj(wbits=-15)
+
+    async def accept(self):
+        pass
+
+    def _count(self, data: bytes):
+        self.frames += 1
+        self.bytes += len(data)
+        self.deflated += len(
+            self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    async def send_text(self, text: str):
+        self._count(text.encode())
+
+    async def send_bytes(self, data: bytes):
+        self._count(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_message(rng: random.Random, i: int) -> dict:
+    kind = rng.random()
+    if kind < 0.5:
+        return {"type": "typing", "user": f"player{rng.randint(0, 5)}@example.com"}
+    if kind < 0.8:
+        rolls = [rng.randint(1, 20) for _ in range(rng.randint(1, 4))]
+        return {
+            "type": "roll",
+            "user": f"player{rng.randint(0, 5)}@example.com",
+            "expression": f"{len(rolls)}d20+3",
+            "rolls": rolls,
+            "total": sum(rolls) + 3,
+        }
+    return {
+        "user": f"player{rng.randint(0, 5)}@example.com",
+        "message": f"I search the chest for traps ({i})",
+        "timestamp": time.time(),
+    }
+
+
+async def run(encoding: str, coalesce: bool, args) -> dict:
+    manager = ConnectionManager(queue_size=4096)
+    manager.coalesce_tick = args.tick_ms / 1000
+    sockets = [WireSocket() for _ in range(args.sockets)]
+    for i, websocket in enumerate(sockets):
+        user = User(uid=f"u{i}", username=f"u{i}", email=f"u{i}@example.com")
+        await manager.connect(websocket, "bench", user, encoding, coalesce)
+    await asyncio.sleep(0.05)
+    for websocket in sockets:
+        websocket.frames = websocket.bytes = websocket.deflated = 0
+
+    rng = random.Random(0)
+    interval = 1 / args.rate
+    start = time.perf_counter()
+    for i in range(int(args.rate * args.seconds)):
+        await manager.broadcast(make_message(rng, i), "bench")
+        await asyncio.sleep(max(0.0, start + (i + 1) * interval - time.perf_counter()))
+    await asyncio.sleep(args.tick_ms / 1000 * 2 + 0.05)
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return {
+        "frames/s": sum(s.frames for s in sockets) / elapsed,
+        "bytes": sum(s.bytes for s in sockets),
+        "deflated": sum(s.deflated for s in sockets),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=1000.0, help="messages/s")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--tick-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.sockets} sockets, {args.rate:.0f} msg/s for {args.seconds} s, "
+        f"tick {args.tick_ms} ms"
+    )
+    modes = [("json", False), ("json", True), ("msgpack", False), ("msgpack", True)]
+    baseline = None
+    for encoding, coalesce in modes:
+        label = f"{encoding}{' + coalesce' if coalesce else ''}"
+        if encoding not in SUPPORTED_ENCODINGS:
+            print(f"{label:20} skipped (msgpack is not installed)")
+            continue
+        result = asyncio.run(run(encoding, coalesce, args))
+        baseline = baseline or result
+        print(
+            f"{label:20} frames/s={result['frames/s']:9.0f}  "
+            f"bytes={result['bytes'] / 1e6:7.2f} MB "
+            f"({result['bytes'] / baseline['bytes']:4.0%})  "
+            f"deflated={result['deflated'] / 1e6:6.2f} MB "
+            f"({result['deflated'] / baseline['bytes']:4.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
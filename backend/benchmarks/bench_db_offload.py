@@ -0,0 +1,97 @@
+"""
+Latency of concurrent requests when Neo4j calls block the event loop
+versus when they are sent through the bounded database thread pool.
+
+Every request performs one simulated Neo4j round-trip (a blocking sleep).
+A lightweight /health probe runs alongside to show how much the loop stalls.
+
+Run from the backend directory:
+    python -m benchmarks.bench_db_offload
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from core.database import run_in_db, shutdown_db_executor
+
+
+def fake_query(latency: float) -> dict:
+    time.sleep(latency)
+    return {"uid": "abc"}
+
+
+def build_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/inline")
+    async def inline():
+        return fake_query(latency)
+
+    @app.get("/offloaded")
+    async def offloaded():
+        return await run_in_db(fake_query, latency)
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def timed_get(client: httpx.AsyncClient, path: str, start: float) -> float:
+    response = await client.get(path)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_scenario(app: FastAPI, path: str, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # Latency is measured from the moment the whole burst is issued
+        start = time.perf_counter()
+        workload = [timed_get(client, path, start) for _ in range(requests)]
+        probes = [
+            timed_get(client, "/health", start) for _ in range(requests // 10 or 1)
+        ]
+        results = await asyncio.gather(*workload, *probes)
+    latencies = results[:requests]
+    probe_latencies = results[requests:]
+    return {
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "health_p99": percentile(probe_latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    app = build_app(args.latency_ms / 1000)
+    print(f"{args.requests} concurrent requests, {args.latency_ms} ms per query")
+    for label, path in (("before (inline)", "/inline"), ("after (pool)", "/offloaded")):
+        result = asyncio.run(run_scenario(app, path, args.requests))
+        print(
+            f"{label:16} p50={result['p50']:8.1f} ms  p99={result['p99']:8.1f} ms  "
+            f"/health p99={result['health_p99']:8.1f} ms"
+        )
+    shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    main()
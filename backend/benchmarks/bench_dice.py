@@ -0,0 +1,91 @@
+"""
+Dice roll throughput: a per-die Python loop versus the cached parser and
+vectorized NumPy RNG, for large rolls and for many concurrent rollers
+broadcasting into a chat room.
+
+Run from the backend directory:
+    python -m benchmarks.bench_dice
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from models.user import User
+from services.connection_manager import ConnectionManager
+from services.dice_service import DiceService
+
+
+def python_roll(count: int, sides: int) -> int:
+    return sum(random.randint(1, sides) for _ in range(count))
+
+
+def rate(func, *args, seconds: float = 1.0) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func(*args)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+class NullSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def concurrent_rollers(rollers: int, rolls: int, listeners: int) -> float:
+    manager = ConnectionManager(queue_size=rollers * rolls + 16)
+    for i in range(listeners):
+        user = User(uid=f"u{i}", username=f"u{i}", email=f"u{i}@example.com")
+        await manager.connect(NullSocket(), "bench", user)
+
+    async def roller(name: str):
+        for _ in range(rolls):
+            result = DiceService.roll("4d6kh3+2")
+            await manager.broadcast({"type": "roll", "user": name, **result}, "bench")
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(roller(f"r{i}") for i in range(rollers)))
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return rollers * rolls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rollers", type=int, default=500)
+    parser.add_argument("--rolls", type=int, default=20)
+    parser.add_argument("--listeners", type=int, default=20)
+    args = parser.parse_args()
+
+    for count, sides in ((1000, 20), (10000, 6)):
+        loop = rate(python_roll, count, sides)
+        engine = rate(DiceService.roll, f"{count}d{sides}")
+        print(
+            f"{count}d{sides:<4} python loop={loop:9.0f} rolls/s  "
+            f"engine={engine:9.0f} rolls/s ({engine / loop:5.1f}x)"
+        )
+
+    small = rate(DiceService.roll, "4d6kh3+2")
+    print(f"4d6kh3+2    engine={small:9.0f} rolls/s (parser cached)")
+
+    throughput = asyncio.run(
+        concurrent_rollers(args.rollers, args.rolls, args.listeners)
+    )
+    print(
+        f"{args.rollers} concurrent rollers x {args.rolls} rolls, "
+        f"{args.listeners} listeners: {throughput:9.0f} rolls/s broadcast"
+    )
+
+
+if __name__ == "__main__":
+    main()
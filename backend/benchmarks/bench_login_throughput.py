@@ -0,0 +1,77 @@
+"""
+Login throughput with bcrypt verification run inline on the event loop versus
+on the password hashing process pool.
+
+A ticker task runs alongside the logins and records the worst event-loop
+stall, which is what chat and character requests experience during a burst.
+
+Run from the backend directory:
+    python -m benchmarks.bench_login_throughput
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.config import settings
+from core.security import (
+    get_password_hash,
+    verify_password,
+    verify_and_update_password,
+    shutdown_hash_executor,
+)
+
+
+async def inline_login(password: str, hashed: str) -> bool:
+    return verify_password(password, hashed)
+
+
+async def pooled_login(password: str, hashed: str) -> bool:
+    verified, _ = await verify_and_update_password(password, hashed)
+    return verified
+
+
+async def ticker(stop: asyncio.Event, interval: float, stalls: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def run_scenario(login, logins: int, hashed: str) -> dict:
+    stop = asyncio.Event()
+    stalls: list = []
+    probe = asyncio.create_task(ticker(stop, 0.005, stalls))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login("secret", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    assert all(results)
+    return {
+        "logins_per_second": logins / elapsed,
+        "max_loop_stall_ms": max(stalls, default=0.0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("secret")
+    print(f"{args.logins} concurrent logins, bcrypt rounds={settings.BCRYPT_ROUNDS}")
+    for label, login in (("inline", inline_login), ("process pool", pooled_login)):
+        result = asyncio.run(run_scenario(login, args.logins, hashed))
+        print(
+            f"{label:13} {result['logins_per_second']:7.1f} logins/s  "
+            f"max loop stall={result['max_loop_stall_ms']:8.1f} ms"
+        )
+    shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Character uid lookup latency with and without the uid unique constraint.
+
+Seeds a throwaway label (BenchCharacter) with --count nodes, times random
+uid lookups as a label scan, then installs the constraint and times them
+again. The label and its constraint are dropped afterwards. Needs the
+NEO4J_URL, NEO4J_USER and NEO4J_PASSWORD environment variables.
+
+Run from the backend directory:
+    python -m benchmarks.bench_schema_lookup --count 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from neomodel import db
+
+from core.config import init_neo4j
+from core.schema import SchemaItem
+
+LABEL = "BenchCharacter"
+CONSTRAINT = SchemaItem("unique", LABEL, ("uid",))
+
+
+def seed(count: int, batch_size: int = 10000) -> list:
+    uids = [uuid.uuid4().hex for _ in range(count)]
+    for start in range(0, count, batch_size):
+        db.cypher_query(
+            f"UNWIND $uids AS uid CREATE (:{LABEL} {{uid: uid, name: 'bench'}})",
+            {"uids": uids[start : start + batch_size]},
+        )
+    return uids
+
+
+def time_lookups(uids: list, lookups: int) -> dict:
+    latencies = []
+    for uid in random.sample(uids, lookups):
+        start = time.perf_counter()
+        db.cypher_query(f"MATCH (c:{LABEL} {{uid: $uid}}) RETURN c", {"uid": uid})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+    }
+
+
+def cleanup():
+    db.cypher_query(f"DROP CONSTRAINT {CONSTRAINT.name} IF EXISTS")
+    db.cypher_query(
+        f"MATCH (c:{LABEL}) CALL {{ WITH c DETACH DELETE c }} IN TRANSACTIONS"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    init_neo4j()
+    cleanup()
+    try:
+        uids = seed(args.count)
+        scan = time_lookups(uids, args.lookups)
+        db.cypher_query(CONSTRAINT.create_statement())
+        db.cypher_query("CALL db.awaitIndexes()")
+        indexed = time_lookups(uids, args.lookups)
+    finally:
+        cleanup()
+
+    print(f"{args.count} nodes, {args.lookups} lookups")
+    print(f"label scan   p50={scan['p50']:7.2f} ms  p99={scan['p99']:7.2f} ms")
+    print(f"with index   p50={indexed['p50']:7.2f} ms  p99={indexed['p99']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-character stat computation versus the vectorized batch engine.
+
+Run from the backend directory:
+    python -m benchmarks.bench_stats_batch
+"""
+
+import argparse
+import random
+import time
+
+from models.character import Character
+from services.character_service import CharacterService
+from services.stats_engine import ABILITIES, compute_stats_arrays, compute_stats_batch
+
+
+def make_characters(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    characters = []
+    for i in range(count):
+        characters.append(
+            Character(
+                uid=f"bench-{i}",
+                name=f"Hero {i}",
+                race="Human",
+                alignment="True Neutral",
+                size="Medium",
+                description="",
+                background="Soldier",
+                character_class="Fighter",
+                armor_class=15,
+                initiative=0,
+                speed=30,
+                hit_points=rng.randint(8, 120),
+                hit_dice="1d10",
+                saving_throws={a: rng.random() < 0.3 for a in ABILITIES},
+                skills={
+                    s: rng.random() < 0.3 for s in CharacterService.skill_to_ability
+                },
+                **{a: rng.randint(3, 20) for a in ABILITIES},
+            )
+        )
+    return characters
+
+
+def best_of(repeats: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def per_character(characters: list):
+    return [CharacterService.build_character_stats(c) for c in characters]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        characters = make_characters(size)
+        loop_ms = best_of(args.repeats, per_character, characters)
+        arrays_ms = best_of(args.repeats, compute_stats_arrays, characters)
+        payload_ms = best_of(args.repeats, compute_stats_batch, characters)
+        print(
+            f"N={size:6}  per-character={loop_ms:8.1f} ms  "
+            f"batch arrays={arrays_ms:7.1f} ms ({loop_ms / arrays_ms:4.1f}x)  "
+            f"batch payloads={payload_ms:7.1f} ms ({loop_ms / payload_ms:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
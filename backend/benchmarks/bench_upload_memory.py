@@ -0,0 +1,132 @@
+"""
+Peak memory of an image upload handler that reads the whole file into
+memory versus one that streams the request body to disk with
+core.uploads.receive_files.
+
+Each variant runs in its own process so its peak RSS is measured in
+isolation. The request body is itself streamed, so the client adds nothing.
+
+Run from the backend directory:
+    python -m benchmarks.bench_upload_memory
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import httpx
+from fastapi import FastAPI, File, Request, UploadFile
+
+from core.uploads import receive_files
+
+BOUNDARY = "bench-upload-boundary"
+CHUNK = 1024 * 1024
+
+
+def build_app(media_dir: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/read-all")
+    async def read_all(file: UploadFile = File(...)):
+        path = os.path.join(media_dir, "read_all.bin")
+        with open(path, "wb") as f:
+            contents = await file.read()
+            f.write(contents)
+        return {"size": len(contents)}
+
+    @app.post("/streamed")
+    async def streamed(request: Request):
+        path = os.path.join(media_dir, "streamed.bin")
+        files = await receive_files(
+            request, lambda *part: path, fields=("file",), max_bytes=1 << 40
+        )
+        return {"size": files["file"].size}
+
+    return app
+
+
+async def multipart_body(size: int):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="big.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode()
+    sent = 0
+    while sent < size:
+        chunk = min(CHUNK, size - sent)
+        yield b"\x89" * chunk
+        sent += chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def rss_mb() -> float:
+    # ru_maxrss is the peak resident set size, in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def upload(app: FastAPI, path: str, size: int) -> int:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        response = await client.post(
+            path,
+            content=multipart_body(size),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+        )
+    response.raise_for_status()
+    return response.json()["size"]
+
+
+def run_child(path: str, size_mb: int):
+    with tempfile.TemporaryDirectory() as media_dir:
+        app = build_app(media_dir)
+        # Warm up imports and the handler before taking the baseline
+        asyncio.run(upload(app, path, CHUNK))
+        baseline = rss_mb()
+        size = asyncio.run(upload(app, path, size_mb * CHUNK))
+        print(f"{baseline:.1f} {rss_mb():.1f} {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--child", choices=("/read-all", "/streamed"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.size_mb)
+        return
+
+    print(f"Peak RSS while uploading {args.size_mb} MB")
+    for label, path in (
+        ("before (read)", "/read-all"),
+        ("after (stream)", "/streamed"),
+    ):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_upload_memory",
+                "--child",
+                path,
+                "--size-mb",
+                str(args.size_mb),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        baseline, peak, size = float(output[0]), float(output[1]), int(output[2])
+        print(
+            f"{label:15} baseline={baseline:7.1f} MB  peak={peak:7.1f} MB  "
+            f"growth={peak - baseline:6.1f} MB  ({size / CHUNK:.0f} MB saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
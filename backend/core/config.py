@@ -1,5 +1,6 @@
 from pydantic import BaseSettings
 from datetime import timedelta
+from typing import Optional
 import os
 from contextlib import asynccontextmanager
 from neomodel import config, db
@@ -14,6 +15,106 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Maximum number of concurrent blocking Neo4j calls
+    NEO4J_MAX_CONCURRENCY: int = 10
+
+    # Persistence backend: "neo4j" or "memory" (in-process, for tests/benchmarks)
+    GRAPH_BACKEND: str = "neo4j"
+
+    # Install missing constraints and indexes at startup
+    NEO4J_AUTO_MIGRATE: bool = True
+
+    # Authenticated user cache
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Password hashing: bcrypt cost factor and process pool size
+    # (PASSWORD_HASH_WORKERS defaults to the number of CPU cores)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+
+    # Derived character stats cache (memory cap is an estimate of payload bytes)
+    STATS_CACHE_MAX_SIZE: int = 4096
+    STATS_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Frames buffered per chat socket before it is dropped as a slow consumer
+    CHAT_SEND_QUEUE_SIZE: int = 256
+
+    # Chat heartbeat: the server pings every interval and closes sockets that
+    # have sent nothing (not even a pong) for the idle timeout
+    CHAT_PING_INTERVAL_SECONDS: float = 20.0
+    CHAT_IDLE_TIMEOUT_SECONDS: float = 60.0
+
+    # Open chat sockets allowed per room and per user (on each worker)
+    CHAT_MAX_CONNECTIONS_PER_ROOM: int = 500
+    CHAT_MAX_CONNECTIONS_PER_USER: int = 5
+
+    # Sockets that connect with ?coalesce=1 get at most one frame per tick
+    CHAT_COALESCE_TICK_MS: float = 25.0
+
+    # Characters one live-sync socket may subscribe to
+    CHARACTER_SYNC_MAX_SUBSCRIPTIONS: int = 50
+
+    # Chat /roll limits: dice per roll, sides per die, terms per expression,
+    # and how many individual dice results are listed in the message
+    DICE_MAX_COUNT: int = 10000
+    DICE_MAX_SIDES: int = 1000
+    DICE_MAX_TERMS: int = 20
+    DICE_MAX_LISTED: int = 100
+
+    # Negotiate permessage-deflate for WebSockets; main.py hands it to
+    # uvicorn, so it applies when the server is started through main.py
+    WS_PER_MESSAGE_DEFLATE: bool = True
+
+    # Bus used to fan chat messages out across workers: "memory" (single
+    # process) or "redis" (requires the redis package)
+    CHAT_PUBSUB_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Messages replayed to new joiners, and how long an idle room keeps them
+    CHAT_HISTORY_SIZE: int = 50
+    CHAT_HISTORY_IDLE_TTL_SECONDS: float = 3600.0
+
+    # Buffered HP/temp HP updates are written to Neo4j this often
+    HP_FLUSH_INTERVAL_SECONDS: float = 0.5
+
+    # Chat messages are written to Neo4j in batches of this size, or at
+    # least this often
+    CHAT_LOG_BATCH_SIZE: int = 200
+    CHAT_LOG_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Outbound HTTP to the image and prompt APIs: timeouts, pool size,
+    # requests in flight at once, and retries of transient failures
+    HTTP_TIMEOUT_SECONDS: float = 60.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_MAX_CONCURRENCY: int = 8
+    HTTP_MAX_RETRIES: int = 2
+    HTTP_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    # Image generation jobs: concurrent generations, jobs a user may have
+    # queued or running, total queued jobs, and how long results are kept
+    IMAGE_JOB_WORKERS: int = 2
+    IMAGE_JOB_MAX_PER_USER: int = 3
+    IMAGE_JOB_MAX_QUEUED: int = 100
+    IMAGE_JOB_TTL_SECONDS: float = 3600.0
+
+    # Generated images and enhanced prompts, keyed by a hash of the model,
+    # prompt and parameters sent upstream
+    IMAGE_CACHE_MAX_SIZE: int = 1024
+    IMAGE_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    PROMPT_CACHE_MAX_SIZE: int = 1024
+    PROMPT_CACHE_TTL_SECONDS: float = 24 * 3600.0
+
+    # Uploaded images and avatars are streamed to disk in chunks of this
+    # size; larger uploads are rejected with 413
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Room for multipart boundaries, part headers and small form fields on
+    # top of the file sizes when capping a whole upload request body
+    UPLOAD_FORM_OVERHEAD: int = 64 * 1024
+
 
 settings = Settings()
 
@@ -0,0 +1,130 @@
+import asyncio
+import random
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .config import settings
+from .metrics import register_metrics
+
+# Upstream answers worth retrying: rate limiting and transient gateway errors
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class HttpClient:
+    """
+    Shared async HTTP client for calls to external APIs (Hugging Face,
+    Mistral).
+
+    One httpx.AsyncClient keeps connections alive between requests. At most
+    max_concurrency requests are in flight at once; the rest wait without
+    blocking the event loop. Transport errors and RETRY_STATUSES are retried
+    with exponential backoff and full jitter.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        connect_timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_concurrency: int,
+        max_retries: int,
+        retry_backoff: float,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    async def start(self):
+        self._ensure_client()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # The pool and semaphore belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.retry_backoff * 2**attempt)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request, retrying transient failures. Returns the last
+        response (which may still be an error status) or raises the last
+        httpx.TransportError.
+        """
+        client = self._ensure_client()
+        self.requests += 1
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        response = await client.request(method, url, **kwargs)
+                    except httpx.TransportError as e:
+                        if attempt >= self.max_retries:
+                            self.failures += 1
+                            raise
+                        print(f"HTTP {method} {url} failed, retrying: {str(e)}")
+                    else:
+                        if (
+                            response.status_code not in RETRY_STATUSES
+                            or attempt >= self.max_retries
+                        ):
+                            return response
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff(attempt - 1))
+            finally:
+                self.in_flight -= 1
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # Created on an event loop that is already gone
+                pass
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+        }
+
+
+http_client = HttpClient(
+    timeout=settings.HTTP_TIMEOUT_SECONDS,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    max_concurrency=settings.HTTP_MAX_CONCURRENCY,
+    max_retries=settings.HTTP_MAX_RETRIES,
+    retry_backoff=settings.HTTP_RETRY_BACKOFF_SECONDS,
+)
+register_metrics("http_client", http_client.stats)
@@ -0,0 +1,12 @@
+from typing import Any, Callable, Dict
+
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, collector: Callable[[], Dict[str, Any]]):
+    """Register a callable returning a dict of metrics under the given name"""
+    _collectors[name] = collector
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: collector() for name, collector in _collectors.items()}
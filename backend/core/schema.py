@@ -0,0 +1,114 @@
+"""
+Idempotent Neo4j schema migration.
+
+Installs the unique constraints and indexes the queries rely on. Runs at
+startup when NEO4J_AUTO_MIGRATE is enabled, or from the command line:
+
+    python -m core.schema           # create anything missing
+    python -m core.schema --check   # only report what is missing
+"""
+
+import argparse
+from typing import List, NamedTuple, Tuple
+
+from neomodel import db
+
+
+class SchemaItem(NamedTuple):
+    kind: str  # "unique" or "index"
+    label: str
+    properties: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        # Same naming scheme as neomodel's install_labels
+        if self.kind == "unique":
+            return f"constraint_unique_{self.label}_{'_'.join(self.properties)}"
+        return f"index_{self.label}_{'_'.join(self.properties)}"
+
+    def create_statement(self) -> str:
+        if self.kind == "unique":
+            return (
+                f"CREATE CONSTRAINT {self.name} IF NOT EXISTS "
+                f"FOR (n:{self.label}) REQUIRE n.{self.properties[0]} IS UNIQUE"
+            )
+        properties = ", ".join(f"n.{prop}" for prop in self.properties)
+        return (
+            f"CREATE INDEX {self.name} IF NOT EXISTS "
+            f"FOR (n:{self.label}) ON ({properties})"
+        )
+
+
+REQUIRED_SCHEMA: List[SchemaItem] = [
+    SchemaItem("unique", "Character", ("uid",)),
+    SchemaItem("unique", "Monster", ("uid",)),
+    SchemaItem("unique", "User", ("uid",)),
+    SchemaItem("unique", "User", ("email",)),
+    SchemaItem("unique", "Spell", ("name",)),
+    SchemaItem("unique", "Item", ("uid",)),
+    SchemaItem("index", "ChatMessage", ("room_id", "timestamp")),
+]
+
+
+def _existing_schema() -> Tuple[set, set]:
+    """Return (unique, indexed) sets of (label, properties) already installed"""
+    unique = set()
+    indexed = set()
+
+    results, _ = db.cypher_query(
+        "SHOW CONSTRAINTS YIELD labelsOrTypes, properties, type"
+    )
+    for labels, properties, constraint_type in results:
+        if labels and properties and "UNIQUE" in constraint_type:
+            unique.add((labels[0], tuple(properties)))
+
+    results, _ = db.cypher_query("SHOW INDEXES YIELD labelsOrTypes, properties")
+    for labels, properties in results:
+        if labels and properties:
+            indexed.add((labels[0], tuple(properties)))
+
+    return unique, indexed
+
+
+def find_missing_schema() -> List[SchemaItem]:
+    unique, indexed = _existing_schema()
+    missing = []
+    for item in REQUIRED_SCHEMA:
+        key = (item.label, item.properties)
+        if item.kind == "unique" and key not in unique:
+            missing.append(item)
+        elif item.kind == "index" and key not in indexed and key not in unique:
+            missing.append(item)
+    return missing
+
+
+def apply_schema() -> List[SchemaItem]:
+    """Create every missing constraint and index, returning what was created"""
+    missing = find_missing_schema()
+    for item in missing:
+        db.cypher_query(item.create_statement())
+    return missing
+
+
+def main():
+    from core.config import init_neo4j
+
+    parser = argparse.ArgumentParser(description="Install the Neo4j schema")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report missing constraints and indexes",
+    )
+    args = parser.parse_args()
+
+    init_neo4j()
+    items = find_missing_schema() if args.check else apply_schema()
+    verb = "Missing" if args.check else "Created"
+    for item in items:
+        print(f"{verb}: {item.name}")
+    if not items:
+        print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
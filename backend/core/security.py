@@ -1,15 +1,35 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
+from .cache import LRUCache
+from .database import run_in_db
+from .metrics import register_metrics
 from models.user import User
+from services.repository import get_repository
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    # Pinning the allowed range flags hashes made with any other cost for rehash
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Resolved users keyed by token subject (email)
+user_cache: LRUCache[User] = LRUCache(
+    max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+register_metrics("user_cache", user_cache.stats)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,6 +39,56 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_executor() -> ProcessPoolExecutor:
+    """Return the process pool used for bcrypt hashing and verification"""
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        )
+    return _hash_executor
+
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the worker pool.
+
+    Returns (verified, new_hash); new_hash is set when the stored hash was made
+    with a different BCRYPT_ROUNDS and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(),
+        _verify_and_update_password,
+        plain_password,
+        hashed_password,
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -32,6 +102,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+async def get_user_by_subject(email: str) -> Optional[User]:
+    """Resolve a token subject to a User, using the process-local cache"""
+    user = user_cache.get(email)
+    if user is None:
+        user = await run_in_db(get_repository().get_user_by_email, email)
+        if user is not None:
+            user_cache.set(email, user)
+    return user
+
+
+def invalidate_cached_user(*emails: Optional[str]):
+    for email in emails:
+        if email:
+            user_cache.invalidate(email)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,7 +134,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     except JWTError:
         raise credentials_exception
 
-    user = User.nodes.first_or_none(email=email)
+    user = await get_user_by_subject(email)
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import tempfile
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException, Request, status
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from .config import settings
+
+
+class ReceivedFile(NamedTuple):
+    filename: str
+    content_type: str
+    path: str
+    size: int
+
+
+def upload_request_body(*fields: str) -> dict:
+    """OpenAPI requestBody for a route that reads these file fields itself"""
+    return {
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            field: {"type": "string", "format": "binary"}
+                            for field in fields
+                        },
+                    }
+                }
+            }
+        }
+    }
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Upload exceeds the {limit} byte limit",
+    )
+
+
+def _bad_body(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _discard(f, temp_path: str):
+    f.close()
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+def _commit(f, temp_path: str, destination: str):
+    f.close()
+    os.replace(temp_path, destination)
+
+
+async def receive_files(
+    request: Request,
+    destination_for: Callable[[str, str, str], str],
+    fields: Sequence[str],
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, ReceivedFile]:
+    """
+    Stream the files in a multipart request body straight to disk.
+
+    The route must not declare File/Form parameters, or FastAPI reads the
+    whole body before the handler runs. Here the body is parsed as it
+    arrives from request.stream(): a Content-Length over the limit is
+    rejected with 413 before anything is read, and a body without one is
+    cut off with 413 as soon as it crosses it. Each file may be at most
+    max_bytes (UPLOAD_MAX_BYTES by default) and the body that much per
+    field plus UPLOAD_FORM_OVERHEAD.
+
+    destination_for(field, filename, content_type) returns the path to save
+    a file to, or raises to reject it before its content is read. Parts
+    that are not one of fields are skipped. Files are written in chunks of
+    chunk_size into temporary files with the blocking writes off the event
+    loop, and only renamed into place once the whole body parsed, so
+    readers never see a partial file and a failed request leaves nothing
+    behind. Returns the received files by field; absent fields are missing.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    max_body = max_bytes * len(fields) + settings.UPLOAD_FORM_OVERHEAD
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body:
+        raise _too_large(max_body)
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise _bad_body("Expected a multipart/form-data body")
+
+    # The parser reports through synchronous callbacks; queue what they see
+    # and handle it between chunks, where the file writes can be awaited
+    events = []
+    headers: Dict[bytes, bytes] = {}
+    header_field, header_value = bytearray(), bytearray()
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_part_data(data: bytes, start: int, end: int):
+        events.append(("data", data[start:end]))
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": headers.clear,
+            "on_header_field": lambda data, start, end: header_field.extend(
+                data[start:end]
+            ),
+            "on_header_value": lambda data, start, end: header_value.extend(
+                data[start:end]
+            ),
+            "on_header_end": on_header_end,
+            "on_headers_finished": lambda: events.append(("part", dict(headers))),
+            "on_part_data": on_part_data,
+            "on_end": lambda: events.append(("end", None)),
+        },
+    )
+
+    loop = asyncio.get_running_loop()
+    received: Dict[str, ReceivedFile] = {}
+    temps: Dict[str, tuple] = {}
+    current: Optional[str] = None
+    buffer = bytearray()
+    body_size = 0
+    finished = False
+
+    async def flush_buffer():
+        if current is not None and buffer:
+            data = bytes(buffer)
+            buffer.clear()
+            await loop.run_in_executor(None, temps[current][0].write, data)
+
+    try:
+        async for chunk in request.stream():
+            body_size += len(chunk)
+            if body_size > max_body:
+                raise _too_large(max_body)
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise _bad_body(f"Malformed multipart body: {e}")
+
+            for kind, payload in events:
+                if kind == "part":
+                    await flush_buffer()
+                    current = None
+                    _, options = parse_options_header(
+                        payload.get(b"content-disposition", b"")
+                    )
+                    field = options.get(b"name", b"").decode("latin-1")
+                    filename = options.get(b"filename", b"").decode("utf-8", "replace")
+                    # Browsers send an empty filename for an unset file input
+                    if field not in fields or not filename or field in received:
+                        continue
+                    part_type = payload.get(
+                        b"content-type", b"application/octet-stream"
+                    ).decode("latin-1")
+                    destination = destination_for(field, filename, part_type)
+                    temps[field] = await loop.run_in_executor(
+                        None, _open_temp, os.path.dirname(destination) or "."
+                    )
+                    received[field] = ReceivedFile(filename, part_type, destination, 0)
+                    current = field
+                elif kind == "data" and current is not None:
+                    size = received[current].size + len(payload)
+                    if size > max_bytes:
+                        raise _too_large(max_bytes)
+                    received[current] = received[current]._replace(size=size)
+                    buffer.extend(payload)
+                    if len(buffer) >= chunk_size:
+                        await flush_buffer()
+                elif kind == "end":
+                    finished = True
+            events.clear()
+        await flush_buffer()
+        if not finished:
+            raise _bad_body("Incomplete multipart body")
+    except BaseException:
+        for f, temp_path in temps.values():
+            await loop.run_in_executor(None, _discard, f, temp_path)
+        raise
+
+    for field, (f, temp_path) in temps.items():
+        await loop.run_in_executor(None, _commit, f, temp_path, received[field].path)
+    return received
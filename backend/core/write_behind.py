@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+from .database import run_in_db
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """
+    Collects items in memory and hands them to a blocking sink in batches.
+
+    A batch is written when batch_size items are pending or interval seconds
+    have passed, whichever comes first. The sink runs on the database thread
+    pool. If it fails the batch is kept for the next attempt, up to
+    max_pending items; beyond that the oldest items are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[T]], Any],
+        batch_size: int = 100,
+        interval: float = 1.0,
+        max_pending: Optional[int] = None,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending or batch_size * 100
+        self.pending: List[T] = []
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def add(self, item: T):
+        self.pending.append(item)
+        overflow = len(self.pending) - self.max_pending
+        if overflow > 0:
+            del self.pending[:overflow]
+            self.dropped += overflow
+        self._ensure_started()
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything pending now"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self.pending:
+                batch = self.pending[: self.batch_size]
+                del self.pending[: len(batch)]
+                try:
+                    await run_in_db(self.sink, batch)
+                except Exception as e:
+                    print(f"Write-behind flush failed: {str(e)}")
+                    self.failures += 1
+                    self.pending[:0] = batch
+                    return
+                self.flushed += len(batch)
+                self.batches += 1
+
+    async def stop(self):
+        """Stop the background flusher and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self.pending),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
@@ -2,8 +2,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from api.main import router as api_router
-from core.config import init_neo4j
-from api.routes import chat_rooms
+from core.config import init_neo4j, settings
+from core.database import shutdown_db_executor
+from core.http_client import http_client
+from core.schema import apply_schema
+from core.security import shutdown_hash_executor
+from api.routes import character_sync, chat_rooms
+from services.character_sync import character_sync as live_characters
+from services.chat_log import chat_log
+from services.hp_write_buffer import hp_buffer
+from services.image_jobs import image_jobs
+from services.connection_manager import manager as chat_manager
 
 app = FastAPI(
     title="D&D Character Manager API",
@@ -39,20 +48,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
 # Initialize Neo4j on startup
 @app.on_event("startup")
 async def startup_event():
+    await http_client.start()
+    if settings.GRAPH_BACKEND != "neo4j":
+        return
     init_neo4j()
+    if settings.NEO4J_AUTO_MIGRATE:
+        for item in apply_schema():
+            print(f"Created Neo4j schema item: {item.name}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Write out buffered chat messages and hit points while the database
+    # pool is still up
+    await chat_log.stop()
+    await hp_buffer.stop()
+    shutdown_db_executor()
+    shutdown_hash_executor()
+    await chat_manager.close()
+    await live_characters.close()
+    await image_jobs.close()
+    await http_client.close()
 
 
 # Include the API routes
 app.include_router(api_router, prefix="/api")
 app.include_router(chat_rooms.router, prefix="/api", tags=["chat"])
+app.include_router(character_sync.router, prefix="/api", tags=["Characters"])
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+    )
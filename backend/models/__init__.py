@@ -1,5 +1,6 @@
 from .user import User
 from .character import Character
+from .chat_message import ChatMessage
 from .character_class import CharacterClass
 from .class_feature import ClassFeature
 from .feature import Feature
@@ -14,6 +15,7 @@ from .subclass import Subclass
 __all__ = [
     "User",
     "Character",
+    "ChatMessage",
     "CharacterClass",
     "ClassFeature",
     "Feature",
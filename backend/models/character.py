@@ -43,8 +43,9 @@ class Character(StructuredNode):
     saving_throws = JSONProperty(required=True)
     skills = JSONProperty(required=True)
 
-    # Image
+    # Images
     image_path = StringProperty()
+    icon_path = StringProperty()
 
     # Relationships
     owner = RelationshipTo(User, "OWNED_BY")
@@ -54,6 +55,8 @@ class Character(StructuredNode):
     created_at = DateTimeProperty(default=datetime.utcnow)
     updated_at = DateTimeProperty(default=datetime.utcnow)
     deleted_at = DateTimeProperty(default=None)
+    # Incremented by every write; conditional updates check it
+    version = IntegerProperty(default=0)
 
     def calculate_proficiency_bonus(self) -> int:
         """Calculate proficiency bonus based on character level"""
@@ -140,8 +143,10 @@ class Character(StructuredNode):
             "saving_throws": self.saving_throws,
             "skills": self.skills,
             "image_path": self.image_path,
+            "icon_path": self.icon_path,
             "current_hit_points": self.current_hit_points,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "deleted_at": self.deleted_at,
+            "version": self.version,
         }
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from neomodel import StructuredNode, StringProperty, DateTimeProperty, UniqueIdProperty
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ChatMessage(StructuredNode):
+    uid = UniqueIdProperty()
+    room_id = StringProperty(required=True)
+    user = StringProperty(required=True)
+    message = StringProperty(default="")
+    # Server receive time; (room_id, timestamp) is indexed for history paging
+    timestamp = DateTimeProperty(default=utc_now)
+
+    @property
+    def sort_key(self) -> Tuple[datetime, str]:
+        """History order; the uid breaks ties between equal timestamps"""
+        return (self.timestamp, self.uid)
+
+    def is_before(self, before: datetime, before_uid: Optional[str] = None) -> bool:
+        """True when this message sorts before the (before, before_uid) cursor"""
+        if before_uid is None:
+            return self.timestamp < before
+        return self.sort_key < (before, before_uid)
+
+    def to_dict(self):
+        return {
+            "uid": self.uid,
+            "room_id": self.room_id,
+            "user": self.user,
+            "message": self.message,
+            "timestamp": self.timestamp,
+        }
@@ -1,5 +1,6 @@
 from models.base_character import BaseCharacter
-from neomodel import FloatProperty, IntegerProperty, StringProperty
+from datetime import datetime
+from neomodel import DateTimeProperty, FloatProperty, IntegerProperty, StringProperty
 from models.enums import Type
 
 
@@ -7,10 +8,7 @@ class Monster(BaseCharacter):
     challenge_rating = FloatProperty()
     experience_points = IntegerProperty()
     monster_type = StringProperty()
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.monster_type.choices = [type.value for type in Type]
+    updated_at = DateTimeProperty(default=datetime.utcnow)
 
     def pre_save(self):
         """Validate enum values before saving"""
@@ -9,8 +9,6 @@ from neomodel import (
 )
 from datetime import datetime
 import os
-from pathlib import Path
-import shutil
 
 
 class User(StructuredNode):
@@ -24,23 +22,22 @@ class User(StructuredNode):
     # Define relationships
     characters = RelationshipFrom("models.character.Character", "OWNED_BY")
 
-    def update_profile(self, avatar_file=None):
-        if avatar_file:
-            # Remove old avatar if exists
-            if self.avatar_path and os.path.exists(self.avatar_path):
+    def avatar_path_for(self, filename: str) -> str:
+        """Where an uploaded avatar with this filename is stored"""
+        file_extension = filename.split(".")[-1]
+        return f"media/users/{self.uid}_avatar.{file_extension}"
+
+    def update_profile(self, avatar_path=None):
+        """Point the profile at an avatar already saved to avatar_path"""
+        if avatar_path:
+            # Remove the old avatar unless the new one replaced it in place
+            if (
+                self.avatar_path
+                and self.avatar_path != avatar_path
+                and os.path.exists(self.avatar_path)
+            ):
                 os.remove(self.avatar_path)
 
-            # Save new avatar
-            media_dir = Path("media/users")
-            media_dir.mkdir(parents=True, exist_ok=True)
-
-            file_extension = avatar_file.filename.split(".")[-1]
-            avatar_path = f"media/users/{self.uid}_avatar.{file_extension}"
-
-            with open(avatar_path, "wb") as buffer:
-                shutil.copyfileobj(avatar_file.file, buffer)
-
             self.avatar_path = avatar_path
-            self.save()
 
         return self
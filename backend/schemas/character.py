@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, List, Union
 from datetime import datetime
 
 
@@ -87,6 +87,8 @@ class CharacterResponse(CharacterBase):
     uid: str
     created_at: datetime
     updated_at: datetime
+    icon_path: Optional[str] = None
+    version: int = 0
 
     class Config:
         orm_mode = True
@@ -155,3 +157,7 @@ class CharacterStatsResponse(BaseModel):
     class Config:
         orm_mode = True
         from_attributes = True
+
+
+class CharacterStatsBatchRequest(BaseModel):
+    uids: List[str] = Field(..., max_items=10000)
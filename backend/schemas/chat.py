@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ChatMessageResponse(BaseModel):
+    uid: str
+    room_id: str
+    user: str
+    message: str
+    timestamp: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ChatHistoryPage(BaseModel):
+    messages: List[ChatMessageResponse]
+    # Pass as ?before=&before_uid= to fetch the next older page; None when
+    # exhausted
+    next_before: Optional[datetime] = None
+    next_before_uid: Optional[str] = None
@@ -1,10 +1,29 @@
-from typing import Optional, Dict, Any
+import json
+import os
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException
+from core.cache import LRUCache
+from core.config import settings
+from core.metrics import register_metrics
 from models.character import Character
 from models.user import User
-from neomodel import db
 from datetime import datetime
 from schemas.character import CharacterStatsResponse
+from services.hp_write_buffer import hp_buffer
+from services.repository import get_repository
+
+
+def _payload_size(stats: Dict[str, Any]) -> int:
+    return len(json.dumps(stats, default=str))
+
+
+# Computed stat blocks keyed by (uid, updated_at)
+stats_cache: LRUCache[Dict[str, Any]] = LRUCache(
+    max_size=settings.STATS_CACHE_MAX_SIZE,
+    max_bytes=settings.STATS_CACHE_MAX_BYTES,
+    sizeof=_payload_size,
+)
+register_metrics("stats_cache", stats_cache.stats)
 
 
 class CharacterService:
@@ -52,10 +71,11 @@ class CharacterService:
             # Calculate and set initial initiative
             character.initiative = character.calculate_initiative()
 
-            character.save()
+            repository = get_repository()
+            repository.save_character(character)
 
             # Create the OWNED_BY relationship
-            character.owner.connect(user)
+            repository.set_owner(character, user)
 
             return character
 
@@ -64,7 +84,17 @@ class CharacterService:
 
     @staticmethod
     def get_character(uid: str) -> Optional[Character]:
-        return Character.nodes.first_or_none(uid=uid)
+        return hp_buffer.overlay(get_repository().get_character(uid))
+
+    @staticmethod
+    def get_owned_character(uid: str, user: User) -> Tuple[bool, Optional[Character]]:
+        """
+        Fetch a character and check that it is OWNED_BY the user in one query.
+
+        Returns (exists, character); character is only inflated when the user owns it.
+        """
+        exists, character = get_repository().get_owned_character(uid, user.uid)
+        return exists, hp_buffer.overlay(character)
 
     @staticmethod
     def update_character(
@@ -74,30 +104,31 @@ class CharacterService:
         if not character:
             return None
 
-        # Update the updated_at timestamp
-        character_data["updated_at"] = datetime.utcnow()
-
-        # Set current_hit_points equal to hit_points if not provided
-        if (
-            "hit_points" in character_data
-            and "current_hit_points" not in character_data
-        ):
-            character_data["current_hit_points"] = character_data["hit_points"]
+        return CharacterService.apply_character_update(character, character_data)
 
+    @staticmethod
+    def apply_character_update(
+        character: Character, character_data, expected_version: Optional[int] = None
+    ) -> Character:
+        """Apply an update to an already loaded character node and save it"""
         # Update only provided fields
-        for key, value in character_data.dict(exclude_unset=True).items():
-            if hasattr(character, key):
-                setattr(character, key, value)
+        update_data = character_data.dict(exclude_unset=True)
 
-        character.save()
-        return character
+        # Set current_hit_points equal to hit_points if not provided
+        if "hit_points" in update_data and "current_hit_points" not in update_data:
+            update_data["current_hit_points"] = update_data["hit_points"]
+
+        return CharacterService.apply_versioned_update(
+            character, update_data, expected_version
+        )
 
     @staticmethod
     def delete_character(uid: str) -> bool:
         character = CharacterService.get_character(uid)
         if not character:
             return False
-        character.delete()
+        get_repository().delete_character(character)
+        CharacterService.invalidate_stats(uid)
         return True
 
     @staticmethod
@@ -105,15 +136,7 @@ class CharacterService:
         """
         Check if user owns the character using Cypher query to ensure correct relationship check
         """
-        query = """
-        MATCH (c:Character)-[:OWNED_BY]->(u:User)
-        WHERE c.uid = $character_uid AND u.uid = $user_uid
-        RETURN count(c) > 0 as is_owner
-        """
-        results, _ = db.cypher_query(
-            query, {"character_uid": character.uid, "user_uid": user.uid}
-        )
-        return results[0][0]
+        return get_repository().is_owner(character.uid, user.uid)
 
     @staticmethod
     def get_experience_for_level(level: int) -> int:
@@ -152,6 +175,31 @@ class CharacterService:
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
 
+        return CharacterService.build_character_stats(character)
+
+    @staticmethod
+    def get_cached_stats(character: Character) -> Dict[str, Any]:
+        """
+        Return the stat block for a loaded character, computing it only when
+        no entry exists for its (uid, updated_at).
+
+        The result is a shallow copy; callers may add top-level keys but must
+        not mutate nested dicts.
+        """
+        key = (character.uid, character.updated_at)
+        stats = stats_cache.get(key)
+        if stats is None:
+            stats = CharacterService.build_character_stats(character)
+            stats_cache.set(key, stats)
+        return dict(stats)
+
+    @staticmethod
+    def invalidate_stats(uid: str):
+        stats_cache.invalidate_matching(lambda key: key[0] == uid)
+
+    @staticmethod
+    def build_character_stats(character: Character) -> Dict[str, Any]:
+        """Compute the stat block from an already loaded character node"""
         # Calculate base values
         ability_modifiers = character.calculate_all_modifiers()
         proficiency_bonus = int(character.calculate_proficiency_bonus())
@@ -190,10 +238,10 @@ class CharacterService:
         next_level_exp = CharacterService.get_experience_for_level(level + 1)
         experience_to_next_level = next_level_exp - experience if level < 20 else 0
 
-        # Ensure current hit points is set
-        if character.current_hit_points is None:
-            character.current_hit_points = character.get_max_hit_points()
-            character.save()
+        # Fall back to max hit points if current hit points were never set
+        current_hit_points = character.current_hit_points
+        if current_hit_points is None:
+            current_hit_points = character.get_max_hit_points()
 
         return {
             # Basic Info
@@ -230,7 +278,7 @@ class CharacterService:
             "initiative": character.calculate_initiative(),
             "speed": character.speed,
             "hit_points": character.get_max_hit_points(),
-            "current_hit_points": character.current_hit_points,
+            "current_hit_points": current_hit_points,
             "temp_hit_points": character.temp_hit_points,
             "hit_dice": character.hit_dice,
             # Experience and Level
@@ -245,26 +293,114 @@ class CharacterService:
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
 
-        # Update ability scores and other stats
-        for key, value in stats_data.items():
-            if hasattr(character, key):
-                setattr(character, key, value)
+        return CharacterService.apply_stats_update(character, stats_data)
 
-        character.save()
+    @staticmethod
+    def apply_stats_update(
+        character: Character,
+        stats_data: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> Character:
+        """Apply a stats update to an already loaded character node and save it"""
+        return CharacterService.apply_versioned_update(
+            character, stats_data, expected_version
+        )
+
+    @staticmethod
+    def apply_versioned_update(
+        character: Character,
+        changes: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> Character:
+        """
+        Write the properties that differ from the loaded node in one
+        conditional SET, provided the stored version is still the one that
+        was read (or expected_version, from the client's If-Match).
+
+        Raises a 409 when someone else wrote the character in between.
+        """
+        loaded_version = character.version or 0
+        if expected_version is None:
+            expected_version = loaded_version
+        flushed_version = hp_buffer.flush_uid(character.uid)
+        # A flush older than the loaded node was overtaken by another write
+        # and says nothing about the current state
+        if flushed_version is not None and flushed_version >= loaded_version:
+            # This worker's buffered hit points were part of the state the
+            # caller saw; any other write since then still conflicts
+            if expected_version == flushed_version - 1:
+                expected_version = flushed_version
+            character.version = flushed_version
+        if expected_version != (character.version or 0):
+            raise HTTPException(
+                status_code=409,
+                detail="Character was modified by another request; reload and retry",
+            )
+
+        properties = Character.defined_properties(aliases=False, rels=False)
+        changed = {
+            key: value
+            for key, value in changes.items()
+            if key in properties and getattr(character, key) != value
+        }
+        if not changed:
+            return character
+        # Bump updated_at so cached stats and ETags keyed on it move on
+        changed["updated_at"] = datetime.utcnow()
+
+        if not get_repository().update_character_properties(
+            character.uid, changed, expected_version
+        ):
+            raise HTTPException(
+                status_code=409,
+                detail="Character was modified by another request; reload and retry",
+            )
+        for key, value in changed.items():
+            setattr(character, key, value)
+        character.version = expected_version + 1
+        CharacterService.invalidate_stats(character.uid)
         return character
 
+    @staticmethod
+    def update_images(
+        character: Character,
+        paths: Dict[str, str],
+        expected_version: Optional[int] = None,
+    ) -> Character:
+        """
+        Point the character at image files already saved under media/, as
+        image_path and/or icon_path. The files are removed again if the
+        update is refused, so a 409 leaves nothing behind; once it commits,
+        the files it replaced are removed instead (best effort). Only files
+        uploaded for this character are removed: generated images may be
+        shared through the image cache.
+        """
+        replaced = [getattr(character, key) for key in paths]
+        try:
+            updated = CharacterService.apply_versioned_update(
+                character, paths, expected_version
+            )
+        except HTTPException:
+            for path in paths.values():
+                os.remove(os.path.join("media", path))
+            raise
+        own_prefix = f"characters/{character.uid}_"
+        for path in replaced:
+            if path and path.startswith(own_prefix) and path not in paths.values():
+                try:
+                    os.remove(os.path.join("media", path))
+                except OSError as e:
+                    print(f"Could not remove replaced image {path}: {str(e)}")
+        return updated
+
     @staticmethod
     def get_user_characters(user: User) -> list[Character]:
         """
         Get all characters owned by a user using the OWNED_BY relationship
         """
-        query = """
-        MATCH (c:Character)-[:OWNED_BY]->(u:User)
-        WHERE u.uid = $uid
-        RETURN c
-        """
-        results, _ = db.cypher_query(query, {"uid": user.uid})
-        characters = [Character.inflate(row[0]) for row in results]
+        characters = hp_buffer.overlay_all(
+            get_repository().list_user_characters(user.uid)
+        )
 
         # Ensure all required fields are present
         for char in characters:
@@ -273,6 +409,13 @@ class CharacterService:
 
         return characters
 
+    @staticmethod
+    def get_owned_characters(uids: list, user: User) -> list:
+        """Fetch the characters among uids that the user owns in one query"""
+        return hp_buffer.overlay_all(
+            get_repository().list_owned_characters(uids, user.uid)
+        )
+
     @staticmethod
     def calculate_level(experience: int) -> int:
         """Calculate character level based on experience points"""
@@ -312,11 +455,16 @@ class CharacterService:
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
 
+        return CharacterService.build_full_stats(character)
+
+    @staticmethod
+    def build_full_stats(character: Character) -> dict:
+        """Build the full stats payload from an already loaded character node"""
         # Get base stats
-        stats = CharacterService.get_character_stats(uid)
+        stats = CharacterService.get_cached_stats(character)
 
         # Add character icon if it exists
-        stats["icon"] = character.icon if hasattr(character, "icon") else None
+        stats["icon"] = character.icon_path or None
 
         # Add basic character info
         stats.update(
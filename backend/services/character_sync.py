@@ -0,0 +1,203 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import status
+from fastapi.encoders import jsonable_encoder
+
+from core.config import settings
+from core.metrics import register_metrics
+from models.character import Character
+from services.connection_manager import (
+    ClientConnection,
+    OutboundMessage,
+    encode_message,
+)
+from services.pubsub import PubSub, create_pubsub, get_pubsub
+
+
+def character_channel(uid: str) -> str:
+    return f"character:{uid}"
+
+
+def character_state(character: Character) -> Dict[str, Any]:
+    """JSON-safe snapshot of what subscribers see"""
+    return jsonable_encoder(character.to_dict())
+
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def diff_states(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    JSON-patch style operations turning old into new. Nested objects are
+    diffed key by key; lists and scalars are replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(diff_states(old[key], value, child))
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        return ops
+    if old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+class CharacterSync:
+    """
+    Pushes character changes to subscribed sockets.
+
+    Writers publish the full character state on the bus after a commit. Each
+    worker keeps the last state and a version number per subscribed uid,
+    diffs locally and sends subscribers a patch. Versions are per worker and
+    increase by one per patch; a client that sees a gap asks for a resync
+    and gets a full snapshot.
+    """
+
+    def __init__(
+        self, pubsub: Optional[PubSub] = None, queue_size: Optional[int] = None
+    ):
+        self.pubsub = pubsub or create_pubsub(settings.CHAT_PUBSUB_BACKEND)
+        self.queue_size = queue_size or settings.CHAT_SEND_QUEUE_SIZE
+        # uid -> subscribed connections
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        # uid -> (version, state)
+        self.snapshots: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # Dict to store connection -> subscribed uids
+        self.subscriptions: Dict[ClientConnection, Set[str]] = {}
+        self.patches_sent = 0
+        self.snapshots_sent = 0
+        self.slow_consumers_dropped = 0
+        self.send_errors = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def open(self, websocket, user) -> ClientConnection:
+        """Start the writer for an accepted socket"""
+        connection = ClientConnection(websocket, user, "characters", self.queue_size)
+        connection.start(self)
+        self.subscriptions[connection] = set()
+        return connection
+
+    async def subscribe(self, connection: ClientConnection, character: Character):
+        uid = character.uid
+        subscribers = self.subscribers.setdefault(uid, set())
+        if not subscribers:
+            self.snapshots[uid] = (1, character_state(character))
+            await self.pubsub.subscribe(character_channel(uid), self._on_message)
+        subscribers.add(connection)
+        self.subscriptions.setdefault(connection, set()).add(uid)
+        self.send_snapshot(connection, uid)
+
+    async def unsubscribe(self, connection: ClientConnection, uid: str):
+        self.subscriptions.get(connection, set()).discard(uid)
+        subscribers = self.subscribers.get(uid)
+        if subscribers is None:
+            return
+        subscribers.discard(connection)
+        if not subscribers:
+            # Stop listening; the snapshot would go stale without updates
+            del self.subscribers[uid]
+            self.snapshots.pop(uid, None)
+            await self.pubsub.unsubscribe(character_channel(uid), self._on_message)
+
+    def send_snapshot(self, connection: ClientConnection, uid: str):
+        if uid not in self.snapshots or uid not in self.subscriptions.get(
+            connection, ()
+        ):
+            return
+        version, state = self.snapshots[uid]
+        self.snapshots_sent += 1
+        self._send(
+            connection,
+            OutboundMessage(
+                encode_message(
+                    {"type": "snapshot", "uid": uid, "version": version, "state": state}
+                )
+            ),
+        )
+
+    async def publish(self, character: Character):
+        """Announce a committed change to every worker"""
+        await self.pubsub.publish(
+            character_channel(character.uid), encode_message(character_state(character))
+        )
+
+    async def _on_message(self, channel: str, data: str):
+        uid = channel[len("character:") :]
+        if uid not in self.subscribers or uid not in self.snapshots:
+            return
+        state = json.loads(data)
+        version, previous = self.snapshots[uid]
+        ops = diff_states(previous, state)
+        if not ops:
+            return
+        version += 1
+        self.snapshots[uid] = (version, state)
+        patch = OutboundMessage(
+            encode_message(
+                {"type": "patch", "uid": uid, "version": version, "ops": ops}
+            )
+        )
+        for connection in list(self.subscribers.get(uid, ())):
+            self.patches_sent += 1
+            self._send(connection, patch)
+
+    def _send(self, connection: ClientConnection, message: OutboundMessage):
+        if not connection.enqueue(message):
+            self.slow_consumers_dropped += 1
+            self.remove(connection)
+            asyncio.ensure_future(self._close(connection))
+
+    @staticmethod
+    async def _close(connection: ClientConnection):
+        try:
+            await connection.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    def remove(self, connection: ClientConnection):
+        """Drop a socket and all of its subscriptions"""
+        connection.stop()
+        for uid in self.subscriptions.pop(connection, set()):
+            subscribers = self.subscribers.get(uid)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.subscribers[uid]
+                    self.snapshots.pop(uid, None)
+                    asyncio.ensure_future(
+                        self.pubsub.unsubscribe(
+                            character_channel(uid), self._on_message
+                        )
+                    )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.subscriptions),
+            "characters": len(self.subscribers),
+            "patches_sent": self.patches_sent,
+            "snapshots_sent": self.snapshots_sent,
+            "slow_consumers_dropped": self.slow_consumers_dropped,
+            "send_errors": self.send_errors,
+        }
+
+    async def close(self):
+        for connection in list(self.subscriptions):
+            connection.stop()
+        self.subscriptions.clear()
+        self.subscribers.clear()
+        self.snapshots.clear()
+        await self.pubsub.close()
+
+
+character_sync = CharacterSync(pubsub=get_pubsub())
+register_metrics("character_sync", character_sync.stats)
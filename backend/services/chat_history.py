@@ -0,0 +1,57 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class ChatHistory:
+    """
+    Last N messages per room, kept as already-encoded JSON frames so a
+    replay is a string join rather than a re-serialization.
+
+    Rooms with no activity for idle_ttl seconds are dropped on the next sweep.
+    """
+
+    def __init__(self, max_messages: int, idle_ttl: Optional[float] = None):
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        # room_id -> (messages, last activity)
+        self.rooms: Dict[str, Tuple[Deque[str], float]] = {}
+        self._next_sweep = time.monotonic() + (idle_ttl or 0)
+
+    def append(self, room_id: str, text: str):
+        if self.max_messages <= 0:
+            return
+        now = time.monotonic()
+        entry = self.rooms.get(room_id)
+        messages = entry[0] if entry else deque(maxlen=self.max_messages)
+        messages.append(text)
+        self.rooms[room_id] = (messages, now)
+        self._sweep(now)
+
+    def get(self, room_id: str) -> List[str]:
+        entry = self.rooms.get(room_id)
+        if entry is None:
+            return []
+        self.rooms[room_id] = (entry[0], time.monotonic())
+        return list(entry[0])
+
+    def replay_frame(self, room_id: str) -> Optional[str]:
+        """One batched frame: {"type":"history","messages":[...]}"""
+        messages = self.get(room_id)
+        if not messages:
+            return None
+        return '{"type":"history","messages":[' + ",".join(messages) + "]}"
+
+    def _sweep(self, now: float):
+        if not self.idle_ttl or now < self._next_sweep:
+            return
+        self._next_sweep = now + self.idle_ttl
+        cutoff = now - self.idle_ttl
+        for room_id in [r for r, (_, seen) in self.rooms.items() if seen <= cutoff]:
+            del self.rooms[room_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "history_rooms": len(self.rooms),
+            "history_messages": sum(len(m) for m, _ in self.rooms.values()),
+        }
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from core.config import settings
+from core.database import run_in_db
+from core.metrics import register_metrics
+from core.write_behind import WriteBehindBuffer
+from models.chat_message import ChatMessage
+from services.repository import get_repository
+
+
+def _save_batch(messages: List[ChatMessage]):
+    get_repository().save_chat_messages(messages)
+
+
+# Chat messages waiting to be written; flushed with one UNWIND per batch
+chat_log: WriteBehindBuffer[ChatMessage] = WriteBehindBuffer(
+    _save_batch,
+    batch_size=settings.CHAT_LOG_BATCH_SIZE,
+    interval=settings.CHAT_LOG_FLUSH_INTERVAL_SECONDS,
+)
+register_metrics("chat_log", chat_log.stats)
+
+
+def record_message(room_id: str, user: str, message) -> ChatMessage:
+    """Queue a chat message for the next batched write"""
+    chat_message = ChatMessage(
+        room_id=room_id, user=user, message="" if message is None else str(message)
+    )
+    chat_log.add(chat_message)
+    return chat_message
+
+
+async def list_room_messages(
+    room_id: str,
+    before: Optional[datetime],
+    limit: int,
+    before_uid: Optional[str] = None,
+) -> List[ChatMessage]:
+    """
+    Page of a room's history, oldest first, including messages that are
+    still waiting in the write-behind buffer. Pages are cut on (timestamp,
+    uid), so messages sharing a timestamp are never skipped.
+    """
+    if before is not None and before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    stored = await run_in_db(
+        get_repository().list_chat_messages, room_id, before, limit, before_uid
+    )
+    seen = {message.uid for message in stored}
+    pending = [
+        message
+        for message in list(chat_log.pending)
+        if message.room_id == room_id
+        and message.uid not in seen
+        and (before is None or message.is_before(before, before_uid))
+    ]
+    messages = sorted(stored + pending, key=lambda message: message.sort_key)
+    return messages[-limit:]
@@ -0,0 +1,409 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from core.config import settings
+from core.metrics import register_metrics
+from models.user import User
+from services.chat_history import ChatHistory
+from services.pubsub import PubSub, create_pubsub, get_pubsub
+
+try:
+    import msgpack
+except ImportError:  # optional: clients can only negotiate JSON
+    msgpack = None
+
+SUPPORTED_ENCODINGS = {"json", "msgpack"} if msgpack else {"json"}
+
+
+def encode_message(message: dict) -> str:
+    # Same compact encoding as WebSocket.send_json
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class OutboundMessage:
+    """
+    One outbound frame shared by every recipient. The JSON text comes from
+    the bus; the MessagePack form is built on first use and reused.
+    """
+
+    __slots__ = ("text", "_msgpack")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._msgpack: Optional[bytes] = None
+
+    def encoded(self, encoding: str) -> Union[str, bytes]:
+        if encoding == "msgpack":
+            if self._msgpack is None:
+                self._msgpack = msgpack.packb(json.loads(self.text))
+            return self._msgpack
+        return self.text
+
+
+def batch_frame(messages: List[OutboundMessage], encoding: str) -> Union[str, bytes]:
+    """Join already-encoded messages into one {"type": "batch"} frame"""
+    if encoding == "msgpack":
+        packer = msgpack.Packer()
+        return (
+            packer.pack_map_header(2)
+            + packer.pack("type")
+            + packer.pack("batch")
+            + packer.pack("messages")
+            + packer.pack_array_header(len(messages))
+            + b"".join(message.encoded("msgpack") for message in messages)
+        )
+    return (
+        '{"type":"batch","messages":['
+        + ",".join(message.text for message in messages)
+        + "]}"
+    )
+
+
+async def receive_payload(websocket: WebSocket) -> Any:
+    """Read one client frame: JSON text, or MessagePack in a binary frame"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+    if message.get("bytes") is not None and msgpack is not None:
+        return msgpack.unpackb(message["bytes"])
+    return json.loads(message.get("text") or message["bytes"])
+
+
+# Application-level heartbeat; clients answer with {"type": "pong"}
+PING_FRAME = OutboundMessage(encode_message({"type": "ping"}))
+PONG_FRAME = OutboundMessage(encode_message({"type": "pong"}))
+
+
+def room_channel(room_id: str) -> str:
+    return f"chat:{room_id}"
+
+
+def pack_envelope(sender_id: Optional[str], text: str, history: bool = False) -> str:
+    # "<h|-><sender connection id>\n<encoded message>": "h" marks messages kept
+    # in room history and the id is empty for system messages, so the payload
+    # is never decoded on the way through the bus
+    return f"{'h' if history else '-'}{sender_id or ''}\n{text}"
+
+
+def unpack_envelope(data: str) -> Tuple[Optional[str], str, bool]:
+    header, _, text = data.partition("\n")
+    return header[1:] or None, text, header[:1] == "h"
+
+
+class ClientConnection:
+    """
+    One WebSocket in a room, with a bounded send queue drained by its own
+    writer task so a slow client never delays delivery to the others.
+
+    With coalesce set (seconds), the writer sends at most one frame per tick,
+    folding whatever queued up meanwhile into a single batch frame.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user: User,
+        room_id: str,
+        queue_size: int,
+        encoding: str = "json",
+        coalesce: float = 0.0,
+    ):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.user = user
+        self.room_id = room_id
+        self.encoding = encoding
+        self.coalesce = coalesce
+        self.queue: "asyncio.Queue[OutboundMessage]" = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        """Record that the client is alive (any inbound frame counts)"""
+        self.last_seen = time.monotonic()
+
+    def start(self, manager: "ConnectionManager"):
+        self.writer = asyncio.create_task(self._write_loop(manager))
+
+    def enqueue(self, message: OutboundMessage) -> bool:
+        """Queue an outbound message; returns False if the queue is full"""
+        if self.closed:
+            return True
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _write_loop(self, manager: "ConnectionManager"):
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                if self.coalesce:
+                    while not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                if len(batch) == 1:
+                    frame = batch[0].encoded(self.encoding)
+                else:
+                    frame = batch_frame(batch, self.encoding)
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                manager.frames_sent += 1
+                manager.bytes_sent += len(frame)
+                if self.coalesce:
+                    await asyncio.sleep(self.coalesce)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client is gone; stop delivering to it
+            manager.send_errors += 1
+            manager.remove(self)
+
+    def stop(self):
+        self.closed = True
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        pubsub: Optional[PubSub] = None,
+        history: Optional[ChatHistory] = None,
+    ):
+        self.queue_size = queue_size or settings.CHAT_SEND_QUEUE_SIZE
+        self.pubsub = pubsub or create_pubsub(settings.CHAT_PUBSUB_BACKEND)
+        self.history = history or ChatHistory(
+            settings.CHAT_HISTORY_SIZE, settings.CHAT_HISTORY_IDLE_TTL_SECONDS
+        )
+        # Rooms whose bus channel this worker listens on
+        self.subscribed_rooms: Set[str] = set()
+        # Dict to store room_id -> {websocket: connection}
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        # Dict to store websocket -> user mapping
+        self.socket_user_map: Dict[WebSocket, User] = {}
+        # Dict to store user uid -> number of open sockets
+        self.user_connections: Dict[str, int] = {}
+        self.max_per_room = settings.CHAT_MAX_CONNECTIONS_PER_ROOM
+        self.max_per_user = settings.CHAT_MAX_CONNECTIONS_PER_USER
+        self.ping_interval = settings.CHAT_PING_INTERVAL_SECONDS
+        self.idle_timeout = settings.CHAT_IDLE_TIMEOUT_SECONDS
+        self.coalesce_tick = settings.CHAT_COALESCE_TICK_MS / 1000
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.slow_consumers_dropped = 0
+        self.send_errors = 0
+        self.rejected = 0
+        self.reaped = 0
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        room_id: str,
+        user: User,
+        encoding: str = "json",
+        coalesce: bool = False,
+    ) -> Optional[ClientConnection]:
+        """
+        Accept a socket into a room, or close it with 1013 and return None
+        when the room or the user is at its connection cap (1003 if the
+        requested encoding is not available).
+        """
+        await websocket.accept()
+        if encoding not in SUPPORTED_ENCODINGS:
+            self.rejected += 1
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+            return None
+        if (
+            len(self.active_connections.get(room_id, ())) >= self.max_per_room
+            or self.user_connections.get(user.uid, 0) >= self.max_per_user
+        ):
+            self.rejected += 1
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return None
+
+        self._ensure_heartbeat()
+        connection = ClientConnection(
+            websocket,
+            user,
+            room_id,
+            self.queue_size,
+            encoding=encoding,
+            coalesce=self.coalesce_tick if coalesce else 0.0,
+        )
+        connection.start(self)
+        if room_id not in self.subscribed_rooms:
+            self.subscribed_rooms.add(room_id)
+            await self.pubsub.subscribe(room_channel(room_id), self._on_message)
+        self.active_connections.setdefault(room_id, {})[websocket] = connection
+        self.socket_user_map[websocket] = user
+        self.user_connections[user.uid] = self.user_connections.get(user.uid, 0) + 1
+        # Catch the newcomer up in a single frame
+        replay = self.history.replay_frame(room_id)
+        if replay is not None:
+            connection.enqueue(OutboundMessage(replay))
+        # Notify others that user joined
+        await self.broadcast(
+            {
+                "user": "system",
+                "message": f"User {user.email} joined the chat",
+                "timestamp": None,
+            },
+            room_id,
+            websocket,
+        )
+        return connection
+
+    def remove(self, connection: ClientConnection):
+        connection.stop()
+        room = self.active_connections.get(connection.room_id)
+        if room is not None and room.get(connection.websocket) is connection:
+            del room[connection.websocket]
+            remaining = self.user_connections.get(connection.user.uid, 1) - 1
+            if remaining > 0:
+                self.user_connections[connection.user.uid] = remaining
+            else:
+                self.user_connections.pop(connection.user.uid, None)
+            if not room:
+                del self.active_connections[connection.room_id]
+                asyncio.ensure_future(self._release_room(connection.room_id))
+        self.socket_user_map.pop(connection.websocket, None)
+
+    def _ensure_heartbeat(self):
+        loop = asyncio.get_running_loop()
+        task = self.heartbeat_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await self.heartbeat()
+
+    async def heartbeat(self):
+        """
+        Close sockets that have been silent for longer than idle_timeout and
+        ping the rest, so half-open connections do not linger in the rooms.
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        for room in list(self.active_connections.values()):
+            for connection in list(room.values()):
+                if connection.last_seen < cutoff:
+                    self.reaped += 1
+                    await self._close(connection, status.WS_1001_GOING_AWAY)
+                elif not connection.enqueue(PING_FRAME):
+                    await self.drop_slow_consumer(connection)
+
+    async def _close(self, connection: ClientConnection, code: int):
+        self.remove(connection)
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _release_room(self, room_id: str):
+        # Someone may have rejoined before this ran
+        if room_id in self.active_connections or room_id not in self.subscribed_rooms:
+            return
+        self.subscribed_rooms.discard(room_id)
+        await self.pubsub.unsubscribe(room_channel(room_id), self._on_message)
+
+    def disconnect(self, websocket: WebSocket, room_id: str):
+        connection = self.active_connections.get(room_id, {}).get(websocket)
+        if connection is not None:
+            self.remove(connection)
+
+    async def broadcast(
+        self,
+        message: dict,
+        room_id: str,
+        sender_socket: Optional[WebSocket] = None,
+        history: bool = False,
+    ):
+        """
+        Publish a message to every socket in the room, on every worker,
+        except the sender. The message is encoded once; with history=True
+        each worker also keeps it in the room's replay buffer.
+        """
+        sender = self.active_connections.get(room_id, {}).get(sender_socket)
+        await self.pubsub.publish(
+            room_channel(room_id),
+            pack_envelope(
+                sender.id if sender else None, encode_message(message), history
+            ),
+        )
+
+    async def _on_message(self, channel: str, data: str):
+        sender_id, text, history = unpack_envelope(data)
+        room_id = channel[len("chat:") :]
+        if history:
+            self.history.append(room_id, text)
+        await self.deliver(room_id, text, sender_id)
+
+    async def deliver(self, room_id: str, text: str, sender_id: Optional[str] = None):
+        """
+        Queue an encoded frame for this worker's sockets in the room.
+
+        Sockets whose queue is full are dropped as slow consumers instead of
+        holding up the rest of the room.
+        """
+        room = self.active_connections.get(room_id)
+        if not room:
+            return
+
+        message = OutboundMessage(text)
+        slow = [
+            connection
+            for connection in room.values()
+            if connection.id != sender_id and not connection.enqueue(message)
+        ]
+        for connection in slow:
+            await self.drop_slow_consumer(connection)
+
+    async def drop_slow_consumer(self, connection: ClientConnection):
+        self.slow_consumers_dropped += 1
+        await self._close(connection, status.WS_1013_TRY_AGAIN_LATER)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self.active_connections),
+            "connections": len(self.socket_user_map),
+            # Aggregates only: /api/metrics is public, room ids are not
+            "largest_room": max(
+                (len(room) for room in self.active_connections.values()), default=0
+            ),
+            "slow_consumers_dropped": self.slow_consumers_dropped,
+            "send_errors": self.send_errors,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+            **self.history.stats(),
+        }
+
+    async def close(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        for room in list(self.active_connections.values()):
+            for connection in list(room.values()):
+                connection.stop()
+        self.active_connections.clear()
+        self.socket_user_map.clear()
+        self.user_connections.clear()
+        self.subscribed_rooms.clear()
+        await self.pubsub.close()
+
+
+manager = ConnectionManager(pubsub=get_pubsub())
+register_metrics("chat", manager.stats)
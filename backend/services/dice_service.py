@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.config import settings
+
+_TERM = re.compile(r"([+-]?)(?:(\d*)d(\d+|%)(?:(kh|kl|dh|dl)(\d+))?|(\d+))")
+
+
+class DiceError(ValueError):
+    """Raised for malformed or oversized roll expressions"""
+
+
+class DiceTerm(NamedTuple):
+    sign: int
+    count: int  # 0 for a flat modifier
+    sides: int
+    keep: Optional[str]  # kh, kl, dh or dl
+    keep_count: int
+    value: int  # flat modifier
+
+    @property
+    def label(self) -> str:
+        if not self.count:
+            return str(self.value)
+        keep = f"{self.keep}{self.keep_count}" if self.keep else ""
+        return f"{self.count}d{self.sides}{keep}"
+
+
+def normalize_expression(expression: str) -> str:
+    """Lowercase a roll and drop the whitespace around its operators"""
+    if re.search(r"\w\s+\w", expression):
+        raise DiceError(f"Invalid roll expression: {expression}")
+    return re.sub(r"\s+", "", expression).lower()
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> Tuple[DiceTerm, ...]:
+    """
+    Parse a normalized roll such as "4d6kh3+2" or "d20-1" into terms.
+
+    Callers pass the result of normalize_expression, so the cache has one
+    entry per formula however it was typed and repeated rolls skip parsing.
+    """
+    if not source:
+        raise DiceError("Empty roll expression")
+
+    terms = []
+    total_dice = 0
+    position = 0
+    while position < len(source):
+        match = _TERM.match(source, position)
+        if match is None or match.end() == position:
+            raise DiceError(f"Invalid roll expression: {source}")
+        if terms and not match.group(1):
+            raise DiceError(f"Invalid roll expression: {source}")
+        position = match.end()
+
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group(6) is not None:
+            terms.append(DiceTerm(sign, 0, 0, None, 0, int(match.group(6))))
+            continue
+
+        count = int(match.group(2) or 1)
+        sides = 100 if match.group(3) == "%" else int(match.group(3))
+        keep, keep_count = match.group(4), int(match.group(5) or 0)
+        if count < 1 or sides < 1:
+            raise DiceError(f"Invalid dice term: {match.group(0)}")
+        if sides > settings.DICE_MAX_SIDES:
+            raise DiceError(f"Dice may have at most {settings.DICE_MAX_SIDES} sides")
+        # At least one die must count towards the total
+        if keep in ("kh", "kl") and not 1 <= keep_count <= count:
+            raise DiceError(f"Cannot keep {keep_count} of {count} dice")
+        if keep in ("dh", "dl") and keep_count >= count:
+            raise DiceError(f"Cannot drop {keep_count} of {count} dice")
+        total_dice += count
+        if total_dice > settings.DICE_MAX_COUNT:
+            raise DiceError(f"At most {settings.DICE_MAX_COUNT} dice per roll")
+        terms.append(DiceTerm(sign, count, sides, keep, keep_count, 0))
+
+    if len(terms) > settings.DICE_MAX_TERMS:
+        raise DiceError(f"At most {settings.DICE_MAX_TERMS} terms per roll")
+    return tuple(terms)
+
+
+class DiceService:
+    rng = np.random.default_rng()
+
+    @staticmethod
+    def _kept(rolls: np.ndarray, term: DiceTerm) -> np.ndarray:
+        if not term.keep:
+            return rolls
+        ordered = np.sort(rolls)
+        if term.keep == "kh":
+            return ordered[len(ordered) - term.keep_count :]
+        if term.keep == "kl":
+            return ordered[: term.keep_count]
+        if term.keep == "dh":
+            return ordered[: len(ordered) - term.keep_count]
+        return ordered[term.keep_count :]
+
+    @staticmethod
+    def roll(expression: str) -> Dict[str, Any]:
+        """
+        Evaluate a roll expression. Each dice term is drawn in one vectorized
+        call; individual results are listed for terms of up to
+        DICE_MAX_LISTED dice.
+        """
+        total = 0
+        details: List[Dict[str, Any]] = []
+        for term in compile_expression(normalize_expression(expression)):
+            if not term.count:
+                total += term.sign * term.value
+                details.append(
+                    {"term": term.label, "sign": term.sign, "total": term.value}
+                )
+                continue
+            rolls = DiceService.rng.integers(1, term.sides + 1, size=term.count)
+            subtotal = int(DiceService._kept(rolls, term).sum())
+            total += term.sign * subtotal
+            detail = {"term": term.label, "sign": term.sign, "total": subtotal}
+            if term.count <= settings.DICE_MAX_LISTED:
+                detail["rolls"] = rolls.tolist()
+            details.append(detail)
+        return {"expression": expression.strip(), "total": total, "terms": details}
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.database import run_in_db
+from core.metrics import register_metrics
+from models.character import Character
+from services.repository import get_repository
+
+HP_FIELDS = ("current_hit_points", "temp_hit_points")
+
+
+class HitPointBuffer:
+    """
+    Write-behind layer for hit point changes during combat.
+
+    Updates that only touch current/temp hit points are applied to the
+    loaded character and kept here as the authoritative value; the request
+    returns without a database write. Every interval the latest values per
+    character are written in one batched UNWIND SET. Reads overlay pending
+    values so this worker never serves a stale HP.
+
+    Versions are only ever bumped by the database: each flush increments
+    the stored version once per character, so a conditional update made on
+    another worker in the meantime is never overwritten or rolled back.
+    Until the flush, readers see the pending HP with the stored version.
+
+    The flush itself is unconditional: it overwrites the stored hit points
+    with this worker's latest values whatever was written since. When one
+    character's HP is edited on several workers, or by a full update in
+    between, whichever flush lands last wins, not the latest edit. Other
+    properties are never touched by a flush.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        # uid -> {field: value, "updated_at": datetime}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        # uid -> version produced by this worker's last periodic flush
+        self.flushed_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+
+    @staticmethod
+    def accepts(stats_data: Dict[str, Any]) -> bool:
+        """True for non-empty updates made only of integer HP fields"""
+        return bool(stats_data) and all(
+            key in HP_FIELDS and type(value) is int for key, value in stats_data.items()
+        )
+
+    def write(self, character: Character, changes: Dict[str, Any]) -> Character:
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self.pending.setdefault(character.uid, {})
+            entry.update(changes)
+            entry["updated_at"] = now
+            self.writes += 1
+        for key, value in changes.items():
+            setattr(character, key, value)
+        character.updated_at = now
+        self._ensure_started()
+        return character
+
+    def overlay(self, character: Optional[Character]) -> Optional[Character]:
+        """Apply pending values to a character loaded from the database"""
+        if character is None:
+            return None
+        with self._lock:
+            entry = self.pending.get(character.uid)
+            entry = dict(entry) if entry else None
+        if entry:
+            for key, value in entry.items():
+                setattr(character, key, value)
+        return character
+
+    def overlay_all(self, characters: List[Character]) -> List[Character]:
+        if self.pending:
+            for character in characters:
+                self.overlay(character)
+        return characters
+
+    def discard(self, uid: str):
+        """Forget pending values, e.g. after a full save or a delete"""
+        with self._lock:
+            self.pending.pop(uid, None)
+            self.flushed_versions.pop(uid, None)
+
+    def flush_uid(self, uid: str) -> Optional[int]:
+        """
+        Write one character's pending values now and return the version the
+        write produced. When a periodic flush already wrote them, return the
+        version that flush produced; None when this worker wrote no hit
+        points. Blocking; runs on the database thread before a conditional
+        update of that character.
+        """
+        with self._lock:
+            changes = self.pending.pop(uid, None)
+            flushed_version = self.flushed_versions.pop(uid, None)
+        if not changes:
+            return flushed_version
+        try:
+            versions = get_repository().save_hit_points(
+                [{"uid": uid, "changes": changes}]
+            )
+        except Exception:
+            with self._lock:
+                self.pending[uid] = {**changes, **self.pending.get(uid, {})}
+            raise
+        self.flushed += 1
+        return versions.get(uid)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        task = self._task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        with self._lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return
+        rows = [{"uid": uid, "changes": changes} for uid, changes in batch.items()]
+        try:
+            versions = await run_in_db(get_repository().save_hit_points, rows)
+        except Exception as e:
+            print(f"Hit point flush failed: {str(e)}")
+            self.failures += 1
+            with self._lock:
+                # Keep anything written since the batch was taken
+                for uid, changes in batch.items():
+                    self.pending[uid] = {**changes, **self.pending.get(uid, {})}
+            return
+        with self._lock:
+            self.flushed_versions.update(versions)
+        self.flushed += len(rows)
+        self.batches += 1
+
+    async def stop(self):
+        """Stop the periodic flusher and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self.pending),
+            "writes": self.writes,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+hp_buffer = HitPointBuffer(interval=settings.HP_FLUSH_INTERVAL_SECONDS)
+register_metrics("hp_buffer", hp_buffer.stats)
@@ -0,0 +1,224 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+from core.metrics import register_metrics
+from services.image_service import ImageGenerationService
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+Runner = Callable[[str, Optional[str]], Awaitable[dict]]
+
+
+class ImageJob:
+    def __init__(self, user_uid: str, prompt: str, character_id: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.user_uid = user_uid
+        self.prompt = prompt
+        self.character_id = character_id
+        self.status = QUEUED
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def finish(self, state: str, result: Optional[dict] = None, error=None):
+        self.status = state
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "prompt": self.prompt,
+            "character_id": self.character_id,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ImageJobQueue:
+    """
+    Runs image generations in the background.
+
+    Submitting returns a job at once; a fixed pool of workers takes queued
+    jobs in order, so at most `workers` generations run at a time. Each
+    user may have max_per_user jobs queued or running, and the queue as a
+    whole holds at most max_queued. Finished jobs are kept for ttl seconds
+    so clients can poll the result. Jobs live on the worker that accepted
+    them.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        workers: int,
+        max_per_user: int,
+        max_queued: int,
+        ttl: float,
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.jobs: Dict[str, ImageJob] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _queued(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == QUEUED)
+
+    def _active(self, user_uid: str) -> int:
+        return sum(
+            1
+            for job in self.jobs.values()
+            if job.user_uid == user_uid and not job.finished
+        )
+
+    def submit(
+        self, user_uid: str, prompt: str, character_id: Optional[str] = None
+    ) -> ImageJob:
+        self._sweep()
+        if self._active(user_uid) >= self.max_per_user:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"At most {self.max_per_user} image jobs per user at a time",
+            )
+        if self._queued() >= self.max_queued:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Image generation queue is full, try again later",
+            )
+        self._ensure_started()
+        job = ImageJob(user_uid, prompt, character_id)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str, user_uid: str) -> Optional[ImageJob]:
+        """A job, if it exists and belongs to the user"""
+        job = self.jobs.get(job_id)
+        if job is None or job.user_uid != user_uid:
+            return None
+        return job
+
+    def cancel(self, job: ImageJob) -> ImageJob:
+        if job.status == QUEUED:
+            # Workers skip it when they reach it in the queue
+            self.cancelled += 1
+            job.finish(CANCELLED)
+        elif job.status == RUNNING and job.task is not None:
+            # The worker records the cancellation when the task unwinds
+            job.cancel_requested = True
+            job.task.cancel()
+        return job
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and all(not task.done() for task in self._tasks):
+            return
+        self._loop = loop
+        self.queue = asyncio.Queue()
+        for job in self.jobs.values():
+            if job.status == QUEUED:
+                self.queue.put_nowait(job)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            if job.status == QUEUED:
+                await self._run(job)
+
+    async def _run(self, job: ImageJob):
+        job.status = RUNNING
+        job.task = asyncio.ensure_future(self.runner(job.prompt, job.character_id))
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            job.finish(CANCELLED)
+            if not job.cancel_requested:
+                # The worker itself is being stopped
+                raise
+        except HTTPException as e:
+            self.failed += 1
+            job.finish(FAILED, error=e.detail)
+        except Exception as e:
+            print(f"Image job {job.id} failed: {str(e)}")
+            self.failed += 1
+            job.finish(FAILED, error="Image generation failed")
+        else:
+            self.succeeded += 1
+            job.finish(SUCCEEDED, result=result)
+        finally:
+            job.task = None
+
+    def _sweep(self):
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queued(),
+            "running": sum(1 for job in self.jobs.values() if job.status == RUNNING),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    async def close(self):
+        for job in list(self.jobs.values()):
+            if job.status == QUEUED:
+                self.cancel(job)
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+image_jobs = ImageJobQueue(
+    runner=ImageGenerationService.generate,
+    workers=settings.IMAGE_JOB_WORKERS,
+    max_per_user=settings.IMAGE_JOB_MAX_PER_USER,
+    max_queued=settings.IMAGE_JOB_MAX_QUEUED,
+    ttl=settings.IMAGE_JOB_TTL_SECONDS,
+)
+register_metrics("image_jobs", image_jobs.stats)
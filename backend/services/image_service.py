@@ -0,0 +1,198 @@
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from core.cache import LRUCache, content_key
+from core.config import settings
+from core.http_client import http_client
+from core.metrics import register_metrics
+from core.singleflight import SingleFlight
+
+HUGGING_FACE_API_URL = (
+    "https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-schnell"
+)
+HUGGING_FACE_API_KEY = os.getenv("HUGGING_FACE_API_KEY")
+MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
+MISTRAL_KEY = os.getenv("MISTRAL_KEY")
+
+headers = {"Authorization": f"Bearer {HUGGING_FACE_API_KEY}"}
+mistral_headers = {"Authorization": f"Bearer {MISTRAL_KEY}"}
+
+STYLE_TEMPLATE = """Layer 1 (background): depict a fantasy background illustration, with a location, palette, 
+                            mood and atmosphere fitting the character's description and the same style as the character.\r\n
+                            Layer 2 (foreground): I want a stylised 2d upper body shot portrait in a hand-drawn, gritty dark fantasy style, 
+                            with bold and strong black ink outlines. Ambient occlusion is always a black shape without variation of oppacity.
+                              It uses simple flat shading with distressed textures and muted and earthy colors, somber and atmospheric. 
+                              I specifically want a highly stylized, non-photorealistic, comic book illustration style, with minimal detail realism, 
+                              like a hand-drawn look. Negative: realism, realistic, digital realism, 3d, hyperrealism, cinematic, glossy, reflective, 
+                              smooth shading. Do not generate any text, label, watermark, or artist tag. 
+                              Character's description: {prompt}"""
+
+GENERATION_PARAMETERS = {
+    "guidance_scale": 1.0,
+    "num_inference_steps": 4,
+    "seed": 4254,
+}
+
+
+# Saved image paths (relative to media/) and enhanced prompts, keyed by a
+# hash of everything sent upstream. The seed is fixed, so the same request
+# always yields the same image.
+image_cache: LRUCache[str] = LRUCache(
+    max_size=settings.IMAGE_CACHE_MAX_SIZE, ttl=settings.IMAGE_CACHE_TTL_SECONDS
+)
+register_metrics("image_cache", image_cache.stats)
+prompt_cache: LRUCache[str] = LRUCache(
+    max_size=settings.PROMPT_CACHE_MAX_SIZE, ttl=settings.PROMPT_CACHE_TTL_SECONDS
+)
+register_metrics("prompt_cache", prompt_cache.stats)
+
+generation_flight = SingleFlight()
+register_metrics("image_generation_flight", generation_flight.stats)
+
+
+def _write_file(path: str, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside the target and swap it in, so readers never see a partial file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+class ImageGenerationService:
+    @staticmethod
+    def build_payload(prompt: str) -> Dict[str, Any]:
+        return {
+            "inputs": STYLE_TEMPLATE.format(prompt=prompt),
+            "parameters": dict(GENERATION_PARAMETERS),
+        }
+
+    @staticmethod
+    def build_enhance_messages(prompt: str) -> List[Dict[str, str]]:
+        # Craft the system and user messages for better prompt enhancement
+        return [
+            {
+                "role": "system",
+                "content": "You are a visual description expert. Enhance this character description with key visual details in 2-3 concise sentences.",
+            },
+            {
+                "role": "user",
+                "content": f"Describe this character's key visual features in 2-3 sentences: {prompt}",
+            },
+        ]
+
+    @staticmethod
+    async def enhance(prompt: str) -> str:
+        """
+        Ask Mistral for a richer visual description of the prompt. Answers
+        are cached by prompt; an unparsable answer falls back to the prompt.
+        """
+        payload = {
+            "model": "mistral-tiny",
+            "messages": ImageGenerationService.build_enhance_messages(prompt),
+            "max_tokens": 150,
+            "temperature": 0.7,
+        }
+        key = content_key(MISTRAL_API_URL, payload)
+        cached = prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await http_client.post(
+                MISTRAL_API_URL, headers=mistral_headers, json=payload
+            )
+        except httpx.HTTPError as e:
+            print(f"Error calling Mistral API: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Prompt enhancement service unavailable",
+            )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to enhance prompt: {response.text}",
+            )
+
+        try:
+            # Extract the enhanced text from the Mistral API response
+            enhanced_prompt = response.json()["choices"][0]["message"]["content"]
+        except (KeyError, IndexError) as e:
+            print(f"Error parsing Mistral API response: {e}")
+            return prompt
+        enhanced_prompt = enhanced_prompt.strip()
+        prompt_cache.set(key, enhanced_prompt)
+        return enhanced_prompt
+
+    @staticmethod
+    async def generate(prompt: str, character_id: Optional[str] = None) -> dict:
+        """
+        Generate a portrait with the Hugging Face inference API and save it
+        under media/. Returns the saved path and the prompts used.
+        """
+        # enhanced_prompt = await enhance_prompt(prompt)
+        enhanced_prompt = prompt
+        payload = ImageGenerationService.build_payload(enhanced_prompt)
+        # Determine save path based on whether it's for a character
+        folder = "characters" if character_id else "generated"
+        key = content_key(HUGGING_FACE_API_URL, payload, folder)
+
+        relative_path = image_cache.get(key)
+        if relative_path is not None and os.path.exists(
+            os.path.join("media", relative_path)
+        ):
+            return ImageGenerationService._result(
+                relative_path, prompt, enhanced_prompt
+            )
+
+        # Identical requests already in flight share that upstream call
+        relative_path = await generation_flight.do(
+            key, lambda: ImageGenerationService._render(payload, key, folder)
+        )
+        return ImageGenerationService._result(relative_path, prompt, enhanced_prompt)
+
+    @staticmethod
+    async def _render(payload: Dict[str, Any], key: str, folder: str) -> str:
+        """Call the inference API and save the image; returns its media path"""
+        try:
+            response = await http_client.post(
+                HUGGING_FACE_API_URL, headers=headers, json=payload
+            )
+        except httpx.HTTPError as e:
+            print(f"Error calling Hugging Face API: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Image generation service unavailable",
+            )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate image",
+            )
+
+        # Name the file after the request, so regenerating replaces it
+        filename = f"generated_{key[:32]}.png"
+        relative_path = f"{folder}/{filename}"
+
+        # Save the image off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, _write_file, os.path.join("media", folder, filename), response.content
+        )
+        image_cache.set(key, relative_path)
+        return relative_path
+
+    @staticmethod
+    def _result(relative_path: str, prompt: str, enhanced_prompt: str) -> dict:
+        return {
+            "message": "Image generated successfully",
+            "image_path": relative_path,
+            "original_prompt": prompt,
+            "enhanced_prompt": enhanced_prompt,
+        }
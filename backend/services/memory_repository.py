@@ -0,0 +1,189 @@
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from neomodel.exceptions import UniqueProperty
+
+from models.character import Character
+from models.chat_message import ChatMessage
+from models.monster import Monster
+from models.user import User
+from services.repository import GraphRepository
+
+
+class InMemoryRepository(GraphRepository):
+    """
+    In-process graph store for tests and benchmarks.
+
+    Nodes are kept as model instances keyed by uid; OWNED_BY edges are kept
+    as a character uid -> user uids mapping. Like Neo4j, every read returns
+    a fresh instance and every save stores a copy, so changes to a loaded
+    node only persist when it is written back.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.users: Dict[str, User] = {}
+        self.characters: Dict[str, Character] = {}
+        self.monsters: Dict[str, Monster] = {}
+        self.owners: Dict[str, Set[str]] = {}
+        self.chat_messages: Dict[str, List[ChatMessage]] = {}
+
+    @staticmethod
+    def _copy(node):
+        if node is None:
+            return None
+        return type(node)(**copy.deepcopy(node.__properties__))
+
+    @staticmethod
+    def _validate(node):
+        pre_save = getattr(node, "pre_save", None)
+        if pre_save:
+            pre_save()
+
+    # Users
+    def get_user(self, uid: str) -> Optional[User]:
+        with self._lock:
+            return self._copy(self.users.get(uid))
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        with self._lock:
+            return self._copy(
+                next(
+                    (user for user in self.users.values() if user.email == email), None
+                )
+            )
+
+    def list_users(self) -> List[User]:
+        with self._lock:
+            return [self._copy(user) for user in self.users.values()]
+
+    def save_user(self, user: User) -> User:
+        with self._lock:
+            for other in self.users.values():
+                if other.uid == user.uid:
+                    continue
+                if other.email == user.email or other.username == user.username:
+                    raise UniqueProperty(f"User {user.email} already exists")
+            self._validate(user)
+            self.users[user.uid] = self._copy(user)
+        return user
+
+    def delete_user(self, user: User):
+        with self._lock:
+            self.users.pop(user.uid, None)
+            for owners in self.owners.values():
+                owners.discard(user.uid)
+
+    # Characters
+    def get_character(self, uid: str) -> Optional[Character]:
+        with self._lock:
+            return self._copy(self.characters.get(uid))
+
+    def get_owned_character(
+        self, uid: str, user_uid: str
+    ) -> Tuple[bool, Optional[Character]]:
+        with self._lock:
+            character = self.characters.get(uid)
+            if character is None:
+                return False, None
+            if user_uid not in self.owners.get(uid, ()):
+                return True, None
+            return True, self._copy(character)
+
+    def list_user_characters(self, user_uid: str) -> List[Character]:
+        with self._lock:
+            return [
+                self._copy(character)
+                for uid, character in self.characters.items()
+                if user_uid in self.owners.get(uid, ())
+            ]
+
+    def list_owned_characters(self, uids: List[str], user_uid: str) -> List[Character]:
+        with self._lock:
+            return [
+                self._copy(self.characters[uid])
+                for uid in dict.fromkeys(uids)
+                if uid in self.characters and user_uid in self.owners.get(uid, ())
+            ]
+
+    def is_owner(self, character_uid: str, user_uid: str) -> bool:
+        return user_uid in self.owners.get(character_uid, ())
+
+    def save_character(self, character: Character) -> Character:
+        with self._lock:
+            self._validate(character)
+            self.characters[character.uid] = self._copy(character)
+        return character
+
+    def set_owner(self, character: Character, user: User):
+        with self._lock:
+            self.owners.setdefault(character.uid, set()).add(user.uid)
+
+    def delete_character(self, character: Character):
+        with self._lock:
+            self.characters.pop(character.uid, None)
+            self.owners.pop(character.uid, None)
+
+    def update_character_properties(
+        self, uid: str, changes: dict, expected_version: int
+    ) -> bool:
+        with self._lock:
+            character = self.characters.get(uid)
+            if character is None or (character.version or 0) != expected_version:
+                return False
+            for key, value in changes.items():
+                setattr(character, key, value)
+            character.version = expected_version + 1
+            return True
+
+    def save_hit_points(self, rows: List[dict]) -> Dict[str, int]:
+        versions = {}
+        with self._lock:
+            for row in rows:
+                character = self.characters.get(row["uid"])
+                if character is not None:
+                    for key, value in row["changes"].items():
+                        setattr(character, key, value)
+                    character.version = (character.version or 0) + 1
+                    versions[character.uid] = character.version
+        return versions
+
+    # Monsters
+    def get_monster(self, uid: str) -> Optional[Monster]:
+        with self._lock:
+            return self._copy(self.monsters.get(uid))
+
+    def save_monster(self, monster: Monster) -> Monster:
+        with self._lock:
+            self._validate(monster)
+            self.monsters[monster.uid] = self._copy(monster)
+        return monster
+
+    def delete_monster(self, monster: Monster):
+        with self._lock:
+            self.monsters.pop(monster.uid, None)
+
+    # Chat
+    def save_chat_messages(self, messages: List[ChatMessage]):
+        with self._lock:
+            for message in messages:
+                self._validate(message)
+                room = self.chat_messages.setdefault(message.room_id, [])
+                room.append(self._copy(message))
+                room.sort(key=lambda m: m.sort_key)
+
+    def list_chat_messages(
+        self,
+        room_id: str,
+        before: Optional[datetime],
+        limit: int,
+        before_uid: Optional[str] = None,
+    ) -> List[ChatMessage]:
+        with self._lock:
+            room = self.chat_messages.get(room_id, [])
+            if before is not None:
+                room = [m for m in room if m.is_before(before, before_uid)]
+            page = room[-limit:] if limit > 0 else []
+            return [self._copy(message) for message in page]
@@ -1,21 +1,22 @@
+from datetime import datetime
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
 from models.monster import Monster
 from models.user import User
+from services.repository import get_repository
 
 
 class MonsterService:
     @staticmethod
     def create_monster(monster_data: Dict[str, Any]) -> Monster:
         try:
-            monster = Monster(**monster_data).save()
-            return monster
+            return get_repository().save_monster(Monster(**monster_data))
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     @staticmethod
     def get_monster(uid: str) -> Optional[Monster]:
-        return Monster.nodes.first_or_none(uid=uid)
+        return get_repository().get_monster(uid)
 
     @staticmethod
     def update_monster(uid: str, monster_data: Dict[str, Any]) -> Optional[Monster]:
@@ -27,7 +28,9 @@ class MonsterService:
             if hasattr(monster, key):
                 setattr(monster, key, value)
 
-        monster.save()
+        monster.updated_at = datetime.utcnow()
+
+        get_repository().save_monster(monster)
         return monster
 
     @staticmethod
@@ -35,5 +38,5 @@ class MonsterService:
         monster = MonsterService.get_monster(uid)
         if not monster:
             return False
-        monster.delete()
+        get_repository().delete_monster(monster)
         return True
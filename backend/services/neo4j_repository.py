@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from neomodel import db
+
+from models.character import Character
+from models.chat_message import ChatMessage
+from models.monster import Monster
+from models.user import User
+from services.repository import GraphRepository
+
+
+class Neo4jRepository(GraphRepository):
+    # Users
+    def get_user(self, uid: str) -> Optional[User]:
+        return User.nodes.first_or_none(uid=uid)
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        return User.nodes.first_or_none(email=email)
+
+    def list_users(self) -> List[User]:
+        return User.nodes.all()
+
+    def save_user(self, user: User) -> User:
+        return user.save()
+
+    def delete_user(self, user: User):
+        user.delete()
+
+    # Characters
+    def get_character(self, uid: str) -> Optional[Character]:
+        return Character.nodes.first_or_none(uid=uid)
+
+    def get_owned_character(
+        self, uid: str, user_uid: str
+    ) -> Tuple[bool, Optional[Character]]:
+        query = """
+        MATCH (c:Character {uid: $uid})
+        WITH c, EXISTS { (c)-[:OWNED_BY]->(:User {uid: $user_uid}) } AS is_owner
+        RETURN CASE WHEN is_owner THEN c ELSE null END AS character
+        """
+        results, _ = db.cypher_query(query, {"uid": uid, "user_uid": user_uid})
+        if not results:
+            return False, None
+        node = results[0][0]
+        return True, Character.inflate(node) if node is not None else None
+
+    def list_user_characters(self, user_uid: str) -> List[Character]:
+        query = """
+        MATCH (c:Character)-[:OWNED_BY]->(u:User)
+        WHERE u.uid = $uid
+        RETURN c
+        """
+        results, _ = db.cypher_query(query, {"uid": user_uid})
+        return [Character.inflate(row[0]) for row in results]
+
+    def list_owned_characters(self, uids: List[str], user_uid: str) -> List[Character]:
+        query = """
+        MATCH (c:Character)-[:OWNED_BY]->(:User {uid: $user_uid})
+        WHERE c.uid IN $uids
+        RETURN c
+        """
+        results, _ = db.cypher_query(query, {"uids": uids, "user_uid": user_uid})
+        return [Character.inflate(row[0]) for row in results]
+
+    def is_owner(self, character_uid: str, user_uid: str) -> bool:
+        query = """
+        MATCH (c:Character)-[:OWNED_BY]->(u:User)
+        WHERE c.uid = $character_uid AND u.uid = $user_uid
+        RETURN count(c) > 0 as is_owner
+        """
+        results, _ = db.cypher_query(
+            query, {"character_uid": character_uid, "user_uid": user_uid}
+        )
+        return results[0][0]
+
+    def save_character(self, character: Character) -> Character:
+        return character.save()
+
+    def set_owner(self, character: Character, user: User):
+        character.owner.connect(user)
+
+    def delete_character(self, character: Character):
+        character.delete()
+
+    @staticmethod
+    def _deflate_changes(changes: dict) -> dict:
+        properties = Character.defined_properties(aliases=False, rels=False)
+        return {
+            key: properties[key].deflate(value) if value is not None else None
+            for key, value in changes.items()
+        }
+
+    def update_character_properties(
+        self, uid: str, changes: dict, expected_version: int
+    ) -> bool:
+        query = """
+        MATCH (c:Character {uid: $uid})
+        WHERE coalesce(c.version, 0) = $version
+        SET c += $changes, c.version = $version + 1
+        RETURN c.version
+        """
+        results, _ = db.cypher_query(
+            query,
+            {
+                "uid": uid,
+                "changes": self._deflate_changes(changes),
+                "version": expected_version,
+            },
+        )
+        return bool(results)
+
+    def save_hit_points(self, rows: List[dict]) -> Dict[str, int]:
+        if not rows:
+            return {}
+        params = [
+            {"uid": row["uid"], "changes": self._deflate_changes(row["changes"])}
+            for row in rows
+        ]
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:Character {uid: row.uid})
+        SET c += row.changes, c.version = coalesce(c.version, 0) + 1
+        RETURN c.uid, c.version
+        """
+        results, _ = db.cypher_query(query, {"rows": params})
+        return {uid: version for uid, version in results}
+
+    # Monsters
+    def get_monster(self, uid: str) -> Optional[Monster]:
+        return Monster.nodes.first_or_none(uid=uid)
+
+    def save_monster(self, monster: Monster) -> Monster:
+        return monster.save()
+
+    def delete_monster(self, monster: Monster):
+        monster.delete()
+
+    # Chat
+    def save_chat_messages(self, messages: List[ChatMessage]):
+        if not messages:
+            return
+        rows = [ChatMessage.deflate(m.__properties__, m) for m in messages]
+        db.cypher_query(
+            "UNWIND $rows AS row CREATE (m:ChatMessage) SET m = row", {"rows": rows}
+        )
+
+    def list_chat_messages(
+        self,
+        room_id: str,
+        before: Optional[datetime],
+        limit: int,
+        before_uid: Optional[str] = None,
+    ) -> List[ChatMessage]:
+        query = """
+        MATCH (m:ChatMessage {room_id: $room_id})
+        WHERE $before IS NULL
+           OR m.timestamp < $before
+           OR ($before_uid IS NOT NULL AND m.timestamp = $before
+               AND m.uid < $before_uid)
+        RETURN m
+        ORDER BY m.timestamp DESC, m.uid DESC
+        LIMIT $limit
+        """
+        params = {
+            "room_id": room_id,
+            "before": ChatMessage.timestamp.deflate(before) if before else None,
+            "before_uid": before_uid,
+            "limit": limit,
+        }
+        results, _ = db.cypher_query(query, params)
+        return [ChatMessage.inflate(row[0]) for row in reversed(results)]
@@ -0,0 +1,146 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+
+Handler = Callable[[str, str], Awaitable[None]]
+
+
+class PubSub(ABC):
+    """
+    Message bus behind chat broadcasts and live character updates.
+
+    Every worker subscribes to the channels of the rooms it has sockets in
+    and publishes each broadcast once; the bus delivers it to all workers,
+    including the publisher, which then fan out to their local sockets.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, List[Handler]] = {}
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str): ...
+
+    async def subscribe(self, channel: str, handler: Handler):
+        handlers = self.handlers.setdefault(channel, [])
+        handlers.append(handler)
+        if len(handlers) == 1:
+            await self._subscribe(channel)
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        handlers = self.handlers.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers and channel in self.handlers:
+            del self.handlers[channel]
+            await self._unsubscribe(channel)
+
+    async def dispatch(self, channel: str, data: str):
+        for handler in list(self.handlers.get(channel, ())):
+            try:
+                await handler(channel, data)
+            except Exception as e:
+                print(f"Pub/sub handler error on {channel}: {str(e)}")
+
+    async def _subscribe(self, channel: str):
+        pass
+
+    async def _unsubscribe(self, channel: str):
+        pass
+
+    async def close(self):
+        self.handlers.clear()
+
+
+class InProcessPubSub(PubSub):
+    """Delivers messages directly to handlers in this process (single worker)"""
+
+    async def publish(self, channel: str, data: str):
+        await self.dispatch(channel, data)
+
+
+class RedisPubSub(PubSub):
+    """
+    Redis PUBLISH/SUBSCRIBE bus shared by every worker and host.
+
+    Takes a redis.asyncio client (or anything with the same publish/pubsub
+    API); when none is given one is created from Settings.REDIS_URL.
+    """
+
+    def __init__(self, client=None, url: Optional[str] = None):
+        super().__init__()
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError(
+                    "The redis package is required for CHAT_PUBSUB_BACKEND=redis"
+                )
+            client = redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self.client = client
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, data: str):
+        await self.client.publish(channel, data)
+
+    async def _subscribe(self, channel: str):
+        if self.pubsub is None:
+            self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(channel)
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self._read_loop())
+
+    async def _unsubscribe(self, channel: str):
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(channel)
+
+    async def _read_loop(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis pub/sub read error: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode()
+            await self.dispatch(channel, data)
+
+    async def close(self):
+        await super().close()
+        if self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.close()
+            self.pubsub = None
+
+
+def create_pubsub(backend: str) -> PubSub:
+    if backend == "memory":
+        return InProcessPubSub()
+    if backend == "redis":
+        return RedisPubSub()
+    raise ValueError(f"Unknown pub/sub backend: {backend}")
+
+
+_pubsub: Optional[PubSub] = None
+
+
+def get_pubsub() -> PubSub:
+    """Return the process-wide bus selected by Settings.CHAT_PUBSUB_BACKEND"""
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = create_pubsub(settings.CHAT_PUBSUB_BACKEND)
+    return _pubsub
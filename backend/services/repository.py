@@ -0,0 +1,138 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+from models.character import Character
+from models.chat_message import ChatMessage
+from models.monster import Monster
+from models.user import User
+
+
+class GraphRepository(ABC):
+    """
+    Persistence interface used by the services.
+
+    Neo4jRepository talks to the database through neomodel; InMemoryRepository
+    keeps everything in process for tests and benchmarks.
+    """
+
+    # Users
+    @abstractmethod
+    def get_user(self, uid: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def list_users(self) -> List[User]: ...
+
+    @abstractmethod
+    def save_user(self, user: User) -> User: ...
+
+    @abstractmethod
+    def delete_user(self, user: User): ...
+
+    # Characters
+    @abstractmethod
+    def get_character(self, uid: str) -> Optional[Character]: ...
+
+    @abstractmethod
+    def get_owned_character(
+        self, uid: str, user_uid: str
+    ) -> Tuple[bool, Optional[Character]]:
+        """Return (exists, character); character is None unless user_uid owns it"""
+
+    @abstractmethod
+    def list_user_characters(self, user_uid: str) -> List[Character]: ...
+
+    @abstractmethod
+    def list_owned_characters(self, uids: List[str], user_uid: str) -> List[Character]:
+        """Return the characters among uids that user_uid owns"""
+
+    @abstractmethod
+    def is_owner(self, character_uid: str, user_uid: str) -> bool: ...
+
+    @abstractmethod
+    def save_character(self, character: Character) -> Character: ...
+
+    @abstractmethod
+    def set_owner(self, character: Character, user: User): ...
+
+    @abstractmethod
+    def delete_character(self, character: Character): ...
+
+    @abstractmethod
+    def update_character_properties(
+        self, uid: str, changes: dict, expected_version: int
+    ) -> bool:
+        """
+        Set only the given properties and bump the version, provided the
+        stored version is still expected_version. Returns False on conflict.
+        """
+
+    @abstractmethod
+    def save_hit_points(self, rows: List[dict]) -> Dict[str, int]:
+        """
+        Write buffered hit point changes in one batch; each row is
+        {"uid": ..., "changes": {property: value}}. Each written character's
+        version is bumped in the database; returns uid -> new version.
+        """
+
+    # Monsters
+    @abstractmethod
+    def get_monster(self, uid: str) -> Optional[Monster]: ...
+
+    @abstractmethod
+    def save_monster(self, monster: Monster) -> Monster: ...
+
+    @abstractmethod
+    def delete_monster(self, monster: Monster): ...
+
+    # Chat
+    @abstractmethod
+    def save_chat_messages(self, messages: List[ChatMessage]):
+        """Persist a batch of messages in one write"""
+
+    @abstractmethod
+    def list_chat_messages(
+        self,
+        room_id: str,
+        before: Optional[datetime],
+        limit: int,
+        before_uid: Optional[str] = None,
+    ) -> List[ChatMessage]:
+        """
+        Return up to limit messages that sort before the (before,
+        before_uid) cursor in (timestamp, uid) order, oldest first. Without
+        before_uid, messages strictly older than before.
+        """
+
+
+_repository: Optional[GraphRepository] = None
+
+
+def create_repository(backend: str) -> GraphRepository:
+    if backend == "neo4j":
+        from services.neo4j_repository import Neo4jRepository
+
+        return Neo4jRepository()
+    if backend == "memory":
+        from services.memory_repository import InMemoryRepository
+
+        return InMemoryRepository()
+    raise ValueError(f"Unknown graph backend: {backend}")
+
+
+def get_repository() -> GraphRepository:
+    """Return the process-wide repository selected by Settings.GRAPH_BACKEND"""
+    global _repository
+    if _repository is None:
+        _repository = create_repository(settings.GRAPH_BACKEND)
+    return _repository
+
+
+def set_repository(repository: Optional[GraphRepository]):
+    """Swap the process-wide repository (None resets to the configured backend)"""
+    global _repository
+    _repository = repository
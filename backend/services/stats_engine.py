@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from models.character import Character
+from services.character_service import CharacterService
+
+ABILITIES = (
+    "strength",
+    "dexterity",
+    "constitution",
+    "intelligence",
+    "wisdom",
+    "charisma",
+)
+SKILLS = tuple(CharacterService.skill_to_ability)
+SKILL_ABILITY_INDEX = np.array(
+    [ABILITIES.index(CharacterService.skill_to_ability[skill]) for skill in SKILLS]
+)
+LEVEL_THRESHOLDS = np.array(
+    [
+        0,
+        300,
+        900,
+        2700,
+        6500,
+        14000,
+        23000,
+        34000,
+        48000,
+        64000,
+        85000,
+        100000,
+        120000,
+        140000,
+        165000,
+        195000,
+        225000,
+        265000,
+        305000,
+        355000,
+    ]
+)
+MAX_LEVEL = len(LEVEL_THRESHOLDS)
+
+
+def compute_stats_arrays(characters: Sequence[Character]) -> Dict[str, np.ndarray]:
+    """
+    Compute derived stats for N characters in one vectorized pass.
+
+    Mirrors CharacterService.build_character_stats; every array has the
+    characters along the first axis.
+    """
+    count = len(characters)
+    scores = np.array(
+        [[getattr(c, ability) for ability in ABILITIES] for c in characters],
+        dtype=np.int64,
+    ).reshape(count, len(ABILITIES))
+    save_proficient = np.array(
+        [[bool(c.saving_throws.get(a, False)) for a in ABILITIES] for c in characters],
+        dtype=bool,
+    ).reshape(count, len(ABILITIES))
+    skill_proficient = np.array(
+        [[bool(c.skills.get(s, False)) for s in SKILLS] for c in characters],
+        dtype=bool,
+    ).reshape(count, len(SKILLS))
+    # Proficiency and max HP use the level attribute, like the model methods
+    level_attr = np.array([getattr(c, "level", 1) for c in characters], dtype=np.int64)
+    experience = np.array(
+        [getattr(c, "experience", 0) for c in characters], dtype=np.int64
+    )
+    hit_points = np.array([c.hit_points for c in characters], dtype=np.int64)
+
+    modifiers = (scores - 10) // 2
+    proficiency_bonus = 2 + (level_attr - 1) // 4
+    saves = modifiers + save_proficient * proficiency_bonus[:, None]
+    skill_modifiers = modifiers[:, SKILL_ABILITY_INDEX]
+    skill_totals = skill_modifiers + skill_proficient * proficiency_bonus[:, None]
+
+    # Level from experience; thresholds at or below the XP count the level
+    level = np.searchsorted(LEVEL_THRESHOLDS, experience, side="right")
+    next_level_exp = LEVEL_THRESHOLDS[np.minimum(level, MAX_LEVEL - 1)]
+    experience_to_next_level = np.where(
+        level < MAX_LEVEL, next_level_exp - experience, 0
+    )
+
+    return {
+        "scores": scores,
+        "modifiers": modifiers,
+        "proficiency_bonus": proficiency_bonus,
+        "save_proficient": save_proficient,
+        "saves": saves,
+        "skill_proficient": skill_proficient,
+        "skill_modifiers": skill_modifiers,
+        "skill_totals": skill_totals,
+        "initiative": modifiers[:, ABILITIES.index("dexterity")],
+        "max_hit_points": hit_points
+        + modifiers[:, ABILITIES.index("constitution")] * level_attr,
+        "experience": experience,
+        "level": level,
+        "experience_to_next_level": experience_to_next_level,
+    }
+
+
+def compute_stats_batch(characters: Sequence[Character]) -> List[Dict[str, Any]]:
+    """Build the same payloads as build_character_stats for many characters"""
+    if not characters:
+        return []
+    arrays = {
+        name: values.tolist()
+        for name, values in compute_stats_arrays(characters).items()
+    }
+
+    payloads = []
+    for i, character in enumerate(characters):
+        scores = arrays["scores"][i]
+        modifiers = arrays["modifiers"][i]
+        current_hit_points = character.current_hit_points
+        if current_hit_points is None:
+            current_hit_points = arrays["max_hit_points"][i]
+
+        payloads.append(
+            {
+                "uid": character.uid,
+                "name": character.name,
+                "race": character.race,
+                "alignment": character.alignment,
+                "size": character.size,
+                "description": character.description,
+                "background": character.background,
+                "character_class": character.character_class,
+                "subclass": character.subclass,
+                "image_path": character.image_path,
+                "created_at": character.created_at,
+                "updated_at": character.updated_at,
+                "deleted_at": character.deleted_at,
+                "ability_scores": dict(zip(ABILITIES, scores)),
+                "ability_modifiers": dict(zip(ABILITIES, modifiers)),
+                "saving_throws": {
+                    ability: {
+                        "is_proficient": arrays["save_proficient"][i][j],
+                        "modifier": modifiers[j],
+                        "total_bonus": arrays["saves"][i][j],
+                    }
+                    for j, ability in enumerate(ABILITIES)
+                },
+                "skills": {
+                    skill: {
+                        "is_proficient": arrays["skill_proficient"][i][j],
+                        "ability": CharacterService.skill_to_ability[skill],
+                        "modifier": arrays["skill_modifiers"][i][j],
+                        "total_bonus": arrays["skill_totals"][i][j],
+                    }
+                    for j, skill in enumerate(SKILLS)
+                },
+                "proficiency_bonus": arrays["proficiency_bonus"][i],
+                "armor_class": character.armor_class,
+                "initiative": arrays["initiative"][i],
+                "speed": character.speed,
+                "hit_points": arrays["max_hit_points"][i],
+                "current_hit_points": current_hit_points,
+                "temp_hit_points": character.temp_hit_points,
+                "hit_dice": character.hit_dice,
+                "experience": arrays["experience"][i],
+                "level": arrays["level"][i],
+                "experience_to_next_level": arrays["experience_to_next_level"][i],
+            }
+        )
+    return payloads
@@ -1,7 +1,8 @@
 from typing import Optional
 from models.user import User
 from schemas.user import UserCreate, UserUpdate, UserSchema
-from core.security import get_password_hash
+from core.security import get_password_hash, invalidate_cached_user
+from services.repository import get_repository
 
 
 class UserService:
@@ -12,23 +13,23 @@ class UserService:
         user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
 
         user = User(**user_dict)
-        user.save()
-        return user
+        return get_repository().save_user(user)
 
     @staticmethod
     def get_user(uid: str) -> Optional[User]:
-        return User.nodes.first_or_none(uid=uid)
+        return get_repository().get_user(uid)
 
     @staticmethod
     def get_user_by_email(email: str) -> Optional[User]:
-        return User.nodes.first_or_none(email=email)
+        return get_repository().get_user_by_email(email)
 
     @staticmethod
     def update_user(uid: str, user_data: UserUpdate) -> Optional[User]:
-        user = User.nodes.first_or_none(uid=uid)
+        user = get_repository().get_user(uid)
         if not user:
             return None
 
+        previous_email = user.email
         update_data = user_data.dict(exclude_unset=True)
 
         # Hash password if it's being updated
@@ -40,17 +41,19 @@ class UserService:
         for key, value in update_data.items():
             setattr(user, key, value)
 
-        user.save()
+        get_repository().save_user(user)
+        invalidate_cached_user(previous_email, user.email)
         return user
 
     @staticmethod
     def delete_user(uid: str) -> bool:
-        user = User.nodes.first_or_none(uid=uid)
+        user = get_repository().get_user(uid)
         if user:
-            user.delete()
+            get_repository().delete_user(user)
+            invalidate_cached_user(user.email)
             return True
         return False
 
     @staticmethod
     def list_users() -> list[User]:
-        return User.nodes.all()
+        return get_repository().list_users()
@@ -0,0 +1,77 @@
+import os
+
+# Keep password hashing cheap in tests; must be set before settings are loaded
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+from neomodel import db
+
+from main import app
+from core.security import get_current_user, user_cache
+from models.user import User
+from services.chat_log import chat_log
+from services.hp_write_buffer import hp_buffer
+from services.memory_repository import InMemoryRepository
+from services.repository import set_repository
+
+
+class QueryCounter:
+    """Records every db.cypher_query call and replays queued results"""
+
+    def __init__(self):
+        self.queries = []
+        self.results = []
+
+    def __call__(self, query, params=None, *args, **kwargs):
+        self.queries.append((query, params))
+        rows = self.results.pop(0) if self.results else []
+        return rows, None
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+
+@pytest.fixture
+def query_counter(monkeypatch):
+    counter = QueryCounter()
+    # db is a thread-local, so patch the class to cover the database thread pool
+    monkeypatch.setattr(
+        type(db),
+        "cypher_query",
+        lambda self, query, params=None, *args, **kwargs: counter(query, params),
+    )
+    return counter
+
+
+@pytest.fixture
+def repository():
+    """Run the app against the in-memory graph store"""
+    repository = InMemoryRepository()
+    set_repository(repository)
+    user_cache.clear()
+    yield repository
+    set_repository(None)
+    user_cache.clear()
+    chat_log.pending.clear()
+    hp_buffer.pending.clear()
+    hp_buffer.flushed_versions.clear()
+
+
+@pytest.fixture
+def api_client(repository):
+    """Client with real token authentication against the in-memory store"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def user():
+    return User(uid="user-1", username="tester", email="tester@example.com")
+
+
+@pytest.fixture
+def client(user):
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
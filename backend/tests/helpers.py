@@ -0,0 +1,191 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeNode(dict):
+    """Stand-in for a neo4j.graph.Node that neomodel can inflate"""
+
+    element_id = "4:test:0"
+
+
+def make_node(model_cls, **properties) -> FakeNode:
+    instance = model_cls(**properties)
+    return FakeNode(
+        model_cls.deflate(instance.__properties__, instance, skip_empty=True)
+    )
+
+
+REGISTRATION = {
+    "username": "aria",
+    "email": "aria@example.com",
+    "password": "lute-and-dagger",
+}
+
+
+def register_and_login(api_client, registration=REGISTRATION) -> dict:
+    response = api_client.post("/api/auth/register", json=registration)
+    assert response.status_code == 200
+    response = api_client.post(
+        "/api/auth/login",
+        json={"email": registration["email"], "password": registration["password"]},
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+CHARACTER_DATA = {
+    "uid": "char-1",
+    "name": "Aria",
+    "race": "Elf",
+    "alignment": "Chaotic Good",
+    "size": "Medium",
+    "description": "A wandering bard",
+    "background": "Entertainer",
+    "character_class": "Bard",
+    "strength": 8,
+    "dexterity": 14,
+    "constitution": 12,
+    "intelligence": 10,
+    "wisdom": 13,
+    "charisma": 17,
+    "armor_class": 13,
+    "initiative": 2,
+    "speed": 30,
+    "hit_points": 9,
+    "current_hit_points": 7,
+    "temp_hit_points": 0,
+    "hit_dice": "1d8",
+    "saving_throws": {"dexterity": True, "charisma": True},
+    "skills": {"performance": True, "persuasion": True},
+}
+
+
+def create_character(api_client, headers: dict, data=CHARACTER_DATA) -> str:
+    """Create a character through the API and return its uid"""
+    payload = {k: v for k, v in data.items() if k != "uid"}
+    response = api_client.post("/api/characters/", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["uid"]
+
+
+class FakeWebSocket:
+    """Records frames sent by the chat ConnectionManager"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.binary_frames = 0
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise RuntimeError("socket is gone")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes):
+        import msgpack
+
+        self.binary_frames += 1
+        self.sent.append(msgpack.unpackb(data))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+class FakeRedis:
+    """
+    In-process stand-in for a redis.asyncio client's PUBLISH/SUBSCRIBE API.
+    Clients created with the same broker dict see each other's messages.
+    """
+
+    def __init__(self, broker: dict):
+        self.broker = broker
+
+    async def publish(self, channel: str, data: str) -> int:
+        queues = self.broker.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": data})
+        return len(queues)
+
+    def pubsub(self):
+        return FakeRedisPubSub(self.broker)
+
+
+class FakeRedisPubSub:
+    def __init__(self, broker: dict):
+        self.broker = broker
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, channel: str):
+        self.broker.setdefault(channel, []).append(self.messages)
+
+    async def unsubscribe(self, channel: str):
+        self.broker.get(channel, []).remove(self.messages)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        pass
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with server.body after server.delay seconds"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.calls += 1
+            server.ports.add(self.client_address[1])
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        self.send_response(status)
+        self.send_header("Content-Type", server.content_type)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(
+    body: bytes = b'{"ok": true}', content_type: str = "application/json"
+) -> ThreadingHTTPServer:
+    """Local HTTP server standing in for an upstream API; see server.url"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.calls = server.active = server.max_active = 0
+    server.ports = set()
+    server.statuses = []
+    server.delay = 0.0
+    server.body = body
+    server.content_type = content_type
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}/"
+    return server
+
+
+def stop_stub_server(server: ThreadingHTTPServer):
+    server.shutdown()
+    server.server_close()
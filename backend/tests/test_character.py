@@ -0,0 +1,198 @@
+from models.character import Character
+from services.character_service import stats_cache
+from tests.helpers import (
+    CHARACTER_DATA,
+    create_character,
+    make_node,
+    register_and_login,
+)
+
+
+def test_get_character_uses_single_query(client, query_counter):
+    query_counter.results.append([[make_node(Character, **CHARACTER_DATA)]])
+
+    response = client.get("/api/characters/char-1")
+
+    assert response.status_code == 200
+    assert query_counter.count == 1
+    body = response.json()
+    assert body["uid"] == "char-1"
+    assert body["current_hit_points"] == 7
+    assert body["skills"]["performance"]["total_bonus"] == 5
+
+
+def test_get_character_not_owned_returns_403(client, query_counter):
+    query_counter.results.append([[None]])
+
+    response = client.get("/api/characters/char-1")
+
+    assert response.status_code == 403
+    assert query_counter.count == 1
+
+
+def test_get_missing_character_returns_404(client, query_counter):
+    response = client.get("/api/characters/missing")
+
+    assert response.status_code == 404
+    assert query_counter.count == 1
+
+
+def test_get_character_stats_uses_ownership_dependency(client, query_counter):
+    query_counter.results.append([[make_node(Character, **CHARACTER_DATA)]])
+
+    response = client.get("/api/characters/char-1/stats")
+
+    assert response.status_code == 200
+    assert query_counter.count == 1
+    assert response.json()["skills"]["performance"]["ability"] == "charisma"
+
+
+def test_delete_character_not_owned_returns_403(client, query_counter):
+    query_counter.results.append([[None]])
+
+    response = client.delete("/api/characters/char-1")
+
+    assert response.status_code == 403
+    assert query_counter.count == 1
+
+
+def test_character_lifecycle_in_memory(api_client, repository):
+    headers = register_and_login(api_client)
+    payload = {k: v for k, v in CHARACTER_DATA.items() if k != "uid"}
+    uid = create_character(api_client, headers)
+
+    response = api_client.get("/api/characters/me", headers=headers)
+    assert [character["uid"] for character in response.json()] == [uid]
+
+    response = api_client.put(
+        f"/api/characters/{uid}", json={**payload, "name": "Aria Vale"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert repository.get_character(uid).name == "Aria Vale"
+
+    response = api_client.delete(f"/api/characters/{uid}", headers=headers)
+    assert response.status_code == 204
+    assert repository.get_character(uid) is None
+
+
+def test_other_users_cannot_modify_character(api_client, repository):
+    owner_headers = register_and_login(api_client)
+    other_headers = register_and_login(
+        api_client,
+        {"username": "brom", "email": "brom@example.com", "password": "axe"},
+    )
+    uid = create_character(api_client, owner_headers)
+
+    response = api_client.delete(f"/api/characters/{uid}", headers=other_headers)
+
+    assert response.status_code == 403
+    assert repository.get_character(uid) is not None
+
+
+def test_stats_batch_returns_only_owned_characters(api_client, repository):
+    headers = register_and_login(api_client)
+    uids = [create_character(api_client, headers) for _ in range(3)]
+
+    response = api_client.post(
+        "/api/characters/stats:batch",
+        json={"uids": uids + ["missing"]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert sorted(stats["uid"] for stats in response.json()) == sorted(uids)
+
+
+def test_stats_are_cached_until_character_changes(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    api_client.get(f"/api/characters/{uid}/stats", headers=headers)
+    hits = stats_cache.hits
+
+    api_client.get(f"/api/characters/{uid}", headers=headers)
+    assert stats_cache.hits == hits + 1
+
+    api_client.patch(
+        f"/api/characters/{uid}/stats", json={"strength": 18}, headers=headers
+    )
+    response = api_client.get(f"/api/characters/{uid}/stats", headers=headers)
+    assert stats_cache.hits == hits + 1
+    assert response.json()["ability_modifiers"]["strength"] == 4
+
+
+def test_conditional_get_returns_304_until_character_changes(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    etag = api_client.get(f"/api/characters/{uid}/stats", headers=headers).headers[
+        "ETag"
+    ]
+
+    response = api_client.get(
+        f"/api/characters/{uid}/stats", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    api_client.patch(
+        f"/api/characters/{uid}/stats", json={"temp_hit_points": 5}, headers=headers
+    )
+    response = api_client.get(
+        f"/api/characters/{uid}/stats", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_stats_update_writes_only_changed_properties(client, query_counter):
+    query_counter.results.append([[make_node(Character, **CHARACTER_DATA)]])
+    query_counter.results.append([[1]])
+
+    response = client.patch(
+        "/api/characters/char-1/stats", json={"strength": 18, "dexterity": 14}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+    assert response.headers["ETag"].startswith('"v1-')
+    query, params = query_counter.queries[-1]
+    assert "WHERE coalesce(c.version, 0) = $version" in query
+    assert params["version"] == 0
+    # dexterity already was 14, so only strength and the timestamp are sent
+    assert set(params["changes"]) == {"strength", "updated_at"}
+
+
+def test_stale_if_match_returns_409(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    etag = api_client.get(f"/api/characters/{uid}", headers=headers).headers["ETag"]
+
+    response = api_client.patch(
+        f"/api/characters/{uid}/stats",
+        json={"strength": 18},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # A second writer still holding the old ETag must not overwrite it
+    for body in ({"strength": 3}, {"current_hit_points": 1}):
+        response = api_client.patch(
+            f"/api/characters/{uid}/stats",
+            json=body,
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 409
+    assert repository.characters[uid].strength == 18
+    assert repository.characters[uid].version == 1
+
+
+def test_memory_repository_reads_are_detached_copies(repository):
+    repository.save_character(Character(**CHARACTER_DATA))
+
+    loaded = repository.get_character("char-1")
+    loaded.current_hit_points = 1
+    loaded.saving_throws["wisdom"] = True
+
+    stored = repository.get_character("char-1")
+    assert stored.current_hit_points == 7
+    assert "wisdom" not in stored.saving_throws
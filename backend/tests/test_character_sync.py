@@ -0,0 +1,69 @@
+import asyncio
+
+from models.character import Character
+from services.character_sync import CharacterSync, diff_states
+from services.pubsub import InProcessPubSub
+from tests.helpers import (
+    CHARACTER_DATA,
+    FakeWebSocket,
+    create_character,
+    register_and_login,
+)
+
+
+def test_diff_states_emits_json_patch_ops():
+    old = {"hp": 7, "skills": {"stealth": False}, "gone": 1}
+    new = {"hp": 3, "skills": {"stealth": True}, "new": "x"}
+    assert diff_states(old, new) == [
+        {"op": "replace", "path": "/hp", "value": 3},
+        {"op": "replace", "path": "/skills/stealth", "value": True},
+        {"op": "add", "path": "/new", "value": "x"},
+        {"op": "remove", "path": "/gone"},
+    ]
+
+
+def test_subscribers_get_snapshot_then_versioned_patches(user):
+    async def scenario():
+        sync = CharacterSync(pubsub=InProcessPubSub())
+        websocket = FakeWebSocket()
+        connection = sync.open(websocket, user)
+        character = Character(**CHARACTER_DATA)
+        await sync.subscribe(connection, character)
+
+        character.current_hit_points = 2
+        await sync.publish(character)
+        await sync.publish(character)  # unchanged: no patch
+        character.temp_hit_points = 5
+        await sync.publish(character)
+        sync.send_snapshot(connection, character.uid)  # client-requested resync
+        await asyncio.sleep(0.01)
+        await sync.close()
+        return websocket
+
+    frames = asyncio.run(scenario()).sent
+    assert [(f["type"], f["version"]) for f in frames] == [
+        ("snapshot", 1),
+        ("patch", 2),
+        ("patch", 3),
+        ("snapshot", 3),
+    ]
+    assert frames[0]["state"]["current_hit_points"] == 7
+    assert frames[1]["ops"] == [
+        {"op": "replace", "path": "/current_hit_points", "value": 2}
+    ]
+    assert frames[3]["state"]["temp_hit_points"] == 5
+
+
+def test_only_owners_can_subscribe(api_client, repository):
+    owner_headers = register_and_login(api_client)
+    other_headers = register_and_login(
+        api_client,
+        {"username": "brom", "email": "brom@example.com", "password": "axe"},
+    )
+    uid = create_character(api_client, owner_headers)
+
+    for headers, expected in ((owner_headers, "snapshot"), (other_headers, "error")):
+        token = headers["Authorization"].split()[1]
+        with api_client.websocket_connect(f"/api/ws/characters?token={token}") as ws:
+            ws.send_json({"type": "subscribe", "uids": [uid]})
+            assert ws.receive_json()["type"] == expected
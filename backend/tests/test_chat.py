@@ -0,0 +1,272 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from fastapi import status
+
+from models.user import User
+from models.chat_message import ChatMessage
+from services.chat_history import ChatHistory
+from services.chat_log import chat_log
+from services.connection_manager import ConnectionManager
+from services.pubsub import RedisPubSub
+from tests.helpers import FakeRedis, FakeWebSocket, register_and_login
+
+
+def make_user(name: str) -> User:
+    return User(uid=name, username=name, email=f"{name}@example.com")
+
+
+async def join(manager: ConnectionManager, room_id: str, *sockets):
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket, room_id, make_user(f"user-{i}"))
+
+
+def test_broadcast_skips_sender_and_encodes_once():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        sender, a, b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await join(manager, "tavern", sender, a, b)
+        await manager.broadcast({"user": "x", "message": "hi"}, "tavern", sender)
+        await asyncio.sleep(0.01)
+        return sender, a, b
+
+    sender, a, b = asyncio.run(scenario())
+    assert {"user": "x", "message": "hi"} in a.sent
+    assert {"user": "x", "message": "hi"} in b.sent
+    assert all(frame.get("message") != "hi" for frame in sender.sent)
+
+
+def test_slow_consumer_is_dropped_without_delaying_others():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2)
+        slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+        await join(manager, "tavern", slow, fast)
+        for i in range(5):
+            await manager.broadcast({"message": i}, "tavern")
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(scenario())
+    assert slow.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert manager.slow_consumers_dropped == 1
+    assert [frame["message"] for frame in fast.sent][-5:] == [0, 1, 2, 3, 4]
+    assert slow not in manager.socket_user_map
+
+
+def test_failing_socket_does_not_abort_delivery():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        dead, alive = FakeWebSocket(fail=True), FakeWebSocket()
+        await join(manager, "tavern", dead, alive)
+        await manager.broadcast({"message": "still here"}, "tavern")
+        await asyncio.sleep(0.01)
+        return manager, alive
+
+    manager, alive = asyncio.run(scenario())
+    assert {"message": "still here"} in alive.sent
+    assert manager.send_errors == 1
+    assert manager.stats()["connections"] == 1
+
+
+def test_rooms_fan_out_across_workers_over_redis():
+    async def scenario():
+        broker = {}
+        worker_a = ConnectionManager(pubsub=RedisPubSub(client=FakeRedis(broker)))
+        worker_b = ConnectionManager(pubsub=RedisPubSub(client=FakeRedis(broker)))
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(alice, "tavern", make_user("alice"))
+        await worker_b.connect(bob, "tavern", make_user("bob"))
+        await worker_a.broadcast({"message": "hello from a"}, "tavern", alice)
+        await asyncio.sleep(0.05)
+
+        worker_b.disconnect(bob, "tavern")
+        await asyncio.sleep(0.01)
+        listeners = len(broker["chat:tavern"])
+        await worker_a.close()
+        await worker_b.close()
+        return alice, bob, listeners
+
+    alice, bob, listeners = asyncio.run(scenario())
+    assert {"message": "hello from a"} in bob.sent
+    assert all(frame.get("message") != "hello from a" for frame in alice.sent)
+    # Worker b stopped listening once its last socket left the room
+    assert listeners == 1
+
+
+def test_join_replays_recent_history_in_one_frame():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8, history=ChatHistory(max_messages=2))
+        speaker, late = FakeWebSocket(), FakeWebSocket()
+        await join(manager, "tavern", speaker)
+        for i in range(3):
+            await manager.broadcast({"message": i}, "tavern", speaker, history=True)
+        await manager.connect(late, "tavern", make_user("late"))
+        await asyncio.sleep(0.01)
+        return late
+
+    late = asyncio.run(scenario())
+    assert late.sent[0] == {
+        "type": "history",
+        "messages": [{"message": 1}, {"message": 2}],
+    }
+
+
+def test_idle_rooms_expire_from_history(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("services.chat_history.time.monotonic", lambda: clock[0])
+    history = ChatHistory(max_messages=10, idle_ttl=60)
+    history.append("quiet", "{}")
+    clock[0] += 61
+    history.append("busy", "{}")
+    assert history.get("quiet") == []
+    assert history.get("busy") == ["{}"]
+
+
+def test_chat_messages_are_logged_and_paged(api_client, repository):
+    headers = register_and_login(api_client)
+    token = headers["Authorization"].split()[1]
+    older = [
+        ChatMessage(room_id="tavern", user="npc@example.com", message=f"old {i}")
+        for i in range(3)
+    ]
+    repository.save_chat_messages(older)
+
+    with api_client.websocket_connect(f"/api/ws/chat/tavern?token={token}") as ws:
+        ws.send_json({"message": "fresh"})
+    # Still buffered, but already visible to the history endpoint
+    response = api_client.get(
+        "/api/chat/rooms/tavern/messages?limit=2", headers=headers
+    )
+    page = response.json()
+    assert [m["message"] for m in page["messages"]] == ["old 2", "fresh"]
+
+    response = api_client.get(
+        "/api/chat/rooms/tavern/messages",
+        params={
+            "limit": 2,
+            "before": page["next_before"],
+            "before_uid": page["next_before_uid"],
+        },
+        headers=headers,
+    )
+    page = response.json()
+    assert [m["message"] for m in page["messages"]] == ["old 0", "old 1"]
+
+    asyncio.run(chat_log.flush())
+    assert [m.message for m in repository.chat_messages["tavern"]][-1] == "fresh"
+
+
+def test_heartbeat_pings_live_sockets_and_reaps_idle_ones():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        alive, silent = FakeWebSocket(), FakeWebSocket()
+        await join(manager, "tavern", alive, silent)
+        live = manager.active_connections["tavern"][alive]
+        manager.active_connections["tavern"][silent].last_seen -= 3600
+        live.touch()
+        await manager.heartbeat()
+        await asyncio.sleep(0.01)
+        stats = manager.stats()
+        await manager.close()
+        return alive, silent, stats
+
+    alive, silent, stats = asyncio.run(scenario())
+    assert {"type": "ping"} in alive.sent
+    assert silent.close_code == status.WS_1001_GOING_AWAY
+    assert stats["reaped"] == 1
+    assert stats["largest_room"] == 1
+
+
+def test_connection_caps_reject_with_1013():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        manager.max_per_user = 1
+        manager.max_per_room = 2
+        same_user = FakeWebSocket()
+        await manager.connect(FakeWebSocket(), "tavern", make_user("a"))
+        await manager.connect(same_user, "keep", make_user("a"))
+        await manager.connect(FakeWebSocket(), "tavern", make_user("b"))
+        room_full = FakeWebSocket()
+        await manager.connect(room_full, "tavern", make_user("c"))
+        stats = manager.stats()
+        await manager.close()
+        return same_user, room_full, stats
+
+    same_user, room_full, stats = asyncio.run(scenario())
+    assert same_user.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert room_full.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert stats["rejected"] == 2
+    assert stats["largest_room"] == 2
+
+
+def test_coalescing_folds_a_burst_into_one_frame():
+    async def scenario():
+        manager = ConnectionManager(queue_size=64)
+        manager.coalesce_tick = 0.02
+        speaker, listener = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(speaker, "tavern", make_user("speaker"))
+        await manager.connect(listener, "tavern", make_user("listener"), coalesce=True)
+        await asyncio.sleep(0.03)
+        for i in range(10):
+            await manager.broadcast({"message": i}, "tavern", speaker)
+        await asyncio.sleep(0.05)
+        await manager.close()
+        return listener
+
+    listener = asyncio.run(scenario())
+    assert listener.sent == [
+        {"type": "batch", "messages": [{"message": i} for i in range(10)]}
+    ]
+
+
+def test_msgpack_clients_get_binary_frames():
+    pytest.importorskip("msgpack")
+
+    async def scenario():
+        manager = ConnectionManager(queue_size=64)
+        speaker, listener = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(speaker, "tavern", make_user("speaker"))
+        await manager.connect(
+            listener, "tavern", make_user("listener"), encoding="msgpack", coalesce=True
+        )
+        await manager.broadcast({"message": "first"}, "tavern", speaker)
+        await manager.broadcast({"message": "second"}, "tavern", speaker)
+        await asyncio.sleep(0.01)
+        await manager.close()
+        return listener
+
+    listener = asyncio.run(scenario())
+    assert listener.binary_frames == 1
+    assert listener.sent == [
+        {"type": "batch", "messages": [{"message": "first"}, {"message": "second"}]}
+    ]
+
+
+def test_history_pages_do_not_skip_messages_sharing_a_timestamp(api_client, repository):
+    headers = register_and_login(api_client)
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    repository.save_chat_messages(
+        [
+            ChatMessage(room_id="tavern", user="npc", message=f"m{i}", timestamp=moment)
+            for i in range(5)
+        ]
+    )
+
+    seen, params = [], {"limit": 2}
+    while True:
+        page = api_client.get(
+            "/api/chat/rooms/tavern/messages", params=params, headers=headers
+        ).json()
+        seen = [m["message"] for m in page["messages"]] + seen
+        if page["next_before"] is None:
+            break
+        params = {
+            "limit": 2,
+            "before": page["next_before"],
+            "before_uid": page["next_before_uid"],
+        }
+
+    assert sorted(seen) == [f"m{i}" for i in range(5)]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from services.dice_service import DiceError, DiceService, compile_expression
+from tests.helpers import register_and_login
+
+
+def test_keep_and_drop(monkeypatch):
+    monkeypatch.setattr(DiceService, "rng", np.random.default_rng(7))
+    result = DiceService.roll("4d6kh3+2")
+    rolls = result["terms"][0]["rolls"]
+    assert result["total"] == sum(sorted(rolls)[1:]) + 2
+
+    result = DiceService.roll("2d20kl1 - 1")
+    rolls = result["terms"][0]["rolls"]
+    assert result["total"] == min(rolls) - 1
+
+
+def test_large_rolls_stay_in_range():
+    result = DiceService.roll("1000d20")
+    assert 1000 <= result["total"] <= 20000
+    # Too many dice to list individually
+    assert "rolls" not in result["terms"][0]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "",
+        "4d",
+        "d",
+        "2d6 3",
+        "3d6kh4",
+        "2d6kh0",
+        "3d6dl3",
+        "1d0",
+        "100000d6",
+        "1d100000",
+    ],
+)
+def test_invalid_expressions(expression):
+    with pytest.raises(DiceError):
+        DiceService.roll(expression)
+
+
+def test_compiled_expressions_are_cached():
+    compile_expression.cache_clear()
+    DiceService.roll("1d8+3")
+    DiceService.roll("1d8+3")
+    DiceService.roll(" 1D8 + 3")
+    assert compile_expression.cache_info().hits == 2
+    assert compile_expression.cache_info().currsize == 1
+
+
+def test_roll_command_is_broadcast_to_everyone(api_client, repository):
+    headers = register_and_login(api_client)
+    token = headers["Authorization"].split()[1]
+    with api_client.websocket_connect(f"/api/ws/chat/dungeon?token={token}") as ws:
+        ws.send_json({"message": "/roll 2d6+1"})
+        roll = ws.receive_json()
+        ws.send_json({"message": "/roll 2d"})
+        error = ws.receive_json()
+        ws.send_json({"message": "  /roll 1d4"})
+        indented = ws.receive_json()
+
+    assert roll["type"] == "roll"
+    assert roll["expression"] == "2d6+1"
+    assert roll["total"] == sum(roll["terms"][0]["rolls"]) + 1
+    assert error["type"] == "error"
+    assert indented["type"] == "roll"
+    assert indented["expression"] == "1d4"
@@ -0,0 +1,135 @@
+import asyncio
+
+from services.hp_write_buffer import hp_buffer
+from tests.helpers import create_character, register_and_login
+
+
+def test_hp_updates_are_buffered_and_flushed_in_one_batch(
+    api_client, repository, monkeypatch
+):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+
+    saves, batches = [], []
+    monkeypatch.setattr(repository, "save_character", saves.append)
+    monkeypatch.setattr(
+        repository, "save_hit_points", lambda rows: batches.append(rows) or {}
+    )
+
+    for hp in (5, 4, 2):
+        response = api_client.patch(
+            f"/api/characters/{uid}/stats",
+            json={"current_hit_points": hp},
+            headers=headers,
+        )
+        assert response.status_code == 200
+    api_client.patch(
+        f"/api/characters/{uid}/stats", json={"temp_hit_points": 3}, headers=headers
+    )
+
+    assert saves == []
+    response = api_client.get(f"/api/characters/{uid}", headers=headers)
+    assert response.json()["current_hit_points"] == 2
+    assert response.json()["temp_hit_points"] == 3
+
+    asyncio.run(hp_buffer.stop())
+    assert len(batches) == 1
+    [row] = batches[0]
+    assert row["uid"] == uid
+    assert row["changes"]["current_hit_points"] == 2
+    assert row["changes"]["temp_hit_points"] == 3
+    assert hp_buffer.pending == {}
+
+
+def test_mixed_updates_bypass_the_buffer(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+
+    api_client.patch(
+        f"/api/characters/{uid}/stats",
+        json={"current_hit_points": 1, "strength": 18},
+        headers=headers,
+    )
+
+    assert uid not in hp_buffer.pending
+    assert repository.characters[uid].strength == 18
+
+
+def test_flush_does_not_roll_back_a_concurrent_conditional_write(
+    api_client, repository
+):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    hp_etag = api_client.patch(
+        f"/api/characters/{uid}/stats",
+        json={"current_hit_points": 3},
+        headers=headers,
+    ).headers["ETag"]
+    assert hp_etag.startswith('"v0-')
+
+    # Another worker commits a versioned update before this worker flushes
+    assert repository.update_character_properties(uid, {"strength": 18}, 0)
+    asyncio.run(hp_buffer.stop())
+
+    stored = repository.get_character(uid)
+    assert stored.version == 2
+    assert (stored.strength, stored.current_hit_points) == (18, 3)
+
+    # The HP ETag predates the other worker's change
+    response = api_client.patch(
+        f"/api/characters/{uid}/stats",
+        json={"strength": 5},
+        headers={**headers, "If-Match": hp_etag},
+    )
+    assert response.status_code == 409
+    assert repository.get_character(uid).strength == 18
+
+
+def test_stale_flushed_version_does_not_conflict_with_a_later_write(
+    api_client, repository
+):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    api_client.patch(
+        f"/api/characters/{uid}/stats",
+        json={"current_hit_points": 3},
+        headers=headers,
+    )
+    asyncio.run(hp_buffer.flush())
+    assert hp_buffer.flushed_versions[uid] == 1
+
+    # Another worker commits on top of the flushed version
+    assert repository.update_character_properties(uid, {"dexterity": 16}, 1)
+
+    response = api_client.patch(
+        f"/api/characters/{uid}/stats", json={"strength": 18}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+    stored = repository.get_character(uid)
+    assert (stored.strength, stored.dexterity, stored.version) == (18, 16, 3)
+
+
+def test_own_buffered_hit_points_do_not_conflict(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+
+    for flush_first in (False, True):
+        etag = api_client.patch(
+            f"/api/characters/{uid}/stats",
+            json={"current_hit_points": 2},
+            headers=headers,
+        ).headers["ETag"]
+        if flush_first:
+            asyncio.run(hp_buffer.flush())
+        response = api_client.patch(
+            f"/api/characters/{uid}/stats",
+            json={"strength": 12 + flush_first},
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 200
+
+    stored = repository.get_character(uid)
+    assert (stored.strength, stored.current_hit_points) == (13, 2)
+    # Each HP flush and each conditional update bumped the version once
+    assert stored.version == 4
@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+
+from core.http_client import HttpClient
+from tests.helpers import start_stub_server, stop_stub_server
+
+
+@pytest.fixture
+def stub_server():
+    server = start_stub_server()
+    yield server
+    stop_stub_server(server)
+
+
+def make_client(**overrides) -> HttpClient:
+    options = dict(
+        timeout=5.0,
+        connect_timeout=1.0,
+        max_connections=10,
+        max_keepalive_connections=10,
+        max_concurrency=10,
+        max_retries=2,
+        retry_backoff=0.01,
+    )
+    options.update(overrides)
+    return HttpClient(**options)
+
+
+def test_connections_are_kept_alive(stub_server):
+    client = make_client()
+
+    async def scenario():
+        for _ in range(5):
+            response = await client.post(stub_server.url, json={})
+            assert response.json() == {"ok": True}
+        await client.close()
+
+    asyncio.run(scenario())
+    assert stub_server.calls == 5
+    assert len(stub_server.ports) == 1
+
+
+def test_transient_statuses_are_retried(stub_server):
+    stub_server.statuses = [503, 429]
+    client = make_client()
+
+    async def scenario():
+        response = await client.post(stub_server.url, json={})
+        await client.close()
+        return response
+
+    assert asyncio.run(scenario()).status_code == 200
+    assert stub_server.calls == 3
+    assert client.retries == 2
+
+
+def test_retries_give_up_with_the_last_response(stub_server):
+    stub_server.statuses = [503, 503, 503, 503]
+    client = make_client(max_retries=1)
+
+    async def scenario():
+        response = await client.post(stub_server.url, json={})
+        await client.close()
+        return response
+
+    assert asyncio.run(scenario()).status_code == 503
+    assert stub_server.calls == 2
+
+
+def test_read_timeout_raises_after_retries(stub_server):
+    stub_server.delay = 0.3
+    client = make_client(timeout=0.05, max_retries=1)
+
+    async def scenario():
+        try:
+            await client.post(stub_server.url, json={})
+        finally:
+            await client.close()
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(scenario())
+    assert stub_server.calls == 2
+    assert client.failures == 1
+
+
+def test_concurrency_is_limited(stub_server):
+    stub_server.delay = 0.05
+    client = make_client(max_concurrency=2)
+
+    async def scenario():
+        await asyncio.gather(*(client.post(stub_server.url, json={}) for _ in range(6)))
+        await client.close()
+
+    asyncio.run(scenario())
+    assert stub_server.calls == 6
+    assert stub_server.max_active == 2
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from main import app
+from services.image_jobs import ImageJobQueue, image_jobs
+from tests.helpers import register_and_login
+
+
+class GatedRunner:
+    """Fake generation that finishes only when released"""
+
+    def __init__(self):
+        self.started = []
+        self.release = None
+
+    async def __call__(self, prompt, character_id=None):
+        if self.release is None:
+            self.release = asyncio.Event()
+        self.started.append(prompt)
+        await self.release.wait()
+        return {"image_path": f"generated/{prompt}.png"}
+
+
+def make_queue(runner, **overrides) -> ImageJobQueue:
+    options = dict(workers=1, max_per_user=2, max_queued=10, ttl=60.0)
+    options.update(overrides)
+    return ImageJobQueue(runner, **options)
+
+
+def test_jobs_run_on_a_bounded_pool_with_per_user_limits():
+    runner = GatedRunner()
+    queue = make_queue(runner)
+
+    async def scenario():
+        first = queue.submit("user-1", "first")
+        second = queue.submit("user-1", "second")
+        with pytest.raises(HTTPException) as error:
+            queue.submit("user-1", "third")
+        assert error.value.status_code == 429
+        other = queue.submit("user-2", "other")
+
+        await asyncio.sleep(0.01)
+        # One worker: only the first job is running
+        assert runner.started == ["first"]
+        assert (first.status, second.status) == ("running", "queued")
+
+        queue.cancel(second)
+        runner.release.set()
+        await asyncio.wait_for(other.done.wait(), 1)
+        await queue.close()
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert first.status == "succeeded"
+    assert first.result == {"image_path": "generated/first.png"}
+    assert second.status == "cancelled"
+    assert other.status == "succeeded"
+    assert runner.started == ["first", "other"]
+
+
+def test_running_job_can_be_cancelled():
+    runner = GatedRunner()
+    queue = make_queue(runner)
+
+    async def scenario():
+        job = queue.submit("user-1", "slow")
+        await asyncio.sleep(0.01)
+        queue.cancel(job)
+        await asyncio.wait_for(job.done.wait(), 1)
+        # The worker survives and takes the next job
+        runner.release.set()
+        after = queue.submit("user-1", "next")
+        await asyncio.wait_for(after.done.wait(), 1)
+        await queue.close()
+        return job, after
+
+    job, after = asyncio.run(scenario())
+    assert job.status == "cancelled"
+    assert after.status == "succeeded"
+    assert queue.stats()["cancelled"] == 1
+
+
+def test_generate_returns_job_and_reports_result(repository, monkeypatch):
+    async def fake_generate(prompt, character_id=None):
+        return {"image_path": "generated/fake.png", "original_prompt": prompt}
+
+    monkeypatch.setattr(settings, "GRAPH_BACKEND", "memory")
+    monkeypatch.setattr(image_jobs, "runner", fake_generate)
+
+    with TestClient(app) as client:
+        headers = register_and_login(client)
+        response = client.post(
+            "/api/image-generation/generate",
+            json={"prompt": "a dwarf"},
+            headers=headers,
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        token = headers["Authorization"].split()[1]
+        with client.websocket_connect(
+            f"/api/image-generation/jobs/{job_id}/ws?token={token}"
+        ) as websocket:
+            frame = websocket.receive_json()
+            if frame["status"] != "succeeded":
+                frame = websocket.receive_json()
+        assert frame["result"]["image_path"] == "generated/fake.png"
+
+        response = client.get(f"/api/image-generation/jobs/{job_id}", headers=headers)
+        assert response.json()["status"] == "succeeded"
+
+        other = register_and_login(
+            client,
+            {
+                "username": "other",
+                "email": "other@example.com",
+                "password": "secret123",
+            },
+        )
+        response = client.get(f"/api/image-generation/jobs/{job_id}", headers=other)
+        assert response.status_code == 404
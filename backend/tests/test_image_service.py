@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from core.http_client import http_client
+from core.singleflight import SingleFlight
+from services import image_service
+from services.image_service import (
+    ImageGenerationService,
+    generation_flight,
+    image_cache,
+    prompt_cache,
+)
+from tests.helpers import start_stub_server, stop_stub_server
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    """Fake upstream APIs; media/ is written under a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    image_cache.clear()
+    prompt_cache.clear()
+    calls = []
+
+    async def fake_post(url, **kwargs):
+        calls.append(url)
+        if "mistral" in url:
+            body = {"choices": [{"message": {"content": " A tall elf. "}}]}
+            return httpx.Response(200, json=body)
+        return httpx.Response(200, content=b"png-bytes")
+
+    monkeypatch.setattr(http_client, "post", fake_post)
+    yield calls
+    image_cache.clear()
+    prompt_cache.clear()
+
+
+def test_identical_generations_reuse_the_saved_image(upstream):
+    hits = image_cache.hits
+
+    async def scenario():
+        first = await ImageGenerationService.generate("a tall elf")
+        second = await ImageGenerationService.generate("a tall elf")
+        other = await ImageGenerationService.generate("a short dwarf")
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert len(upstream) == 2
+    assert first["image_path"] == second["image_path"]
+    assert other["image_path"] != first["image_path"]
+    assert image_cache.hits == hits + 1
+    with open(os.path.join("media", first["image_path"]), "rb") as f:
+        assert f.read() == b"png-bytes"
+
+
+def test_missing_file_is_regenerated(upstream):
+    async def scenario():
+        first = await ImageGenerationService.generate("a tall elf", "char-1")
+        os.remove(os.path.join("media", first["image_path"]))
+        return first, await ImageGenerationService.generate("a tall elf", "char-1")
+
+    first, second = asyncio.run(scenario())
+    assert len(upstream) == 2
+    assert second["image_path"] == first["image_path"]
+    assert first["image_path"].startswith("characters/")
+
+
+def test_enhanced_prompts_are_cached(upstream):
+    async def scenario():
+        return [await ImageGenerationService.enhance("elf") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["A tall elf."] * 3
+    assert len(upstream) == 1
+    assert prompt_cache.stats()["hits"] == 2
+
+
+def test_concurrent_identical_generations_share_one_upstream_call(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    image_cache.clear()
+    server = start_stub_server(b"png-bytes", "image/png")
+    server.delay = 0.1
+    monkeypatch.setattr(image_service, "HUGGING_FACE_API_URL", server.url)
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(ImageGenerationService.generate("the whole party") for _ in range(5)),
+            ImageGenerationService.generate("someone else"),
+        )
+        await http_client.close()
+        return results
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        stop_stub_server(server)
+        image_cache.clear()
+
+    assert server.calls == 2
+    paths = {result["image_path"] for result in results[:5]}
+    assert len(paths) == 1
+    assert results[5]["image_path"] not in paths
+    with open(os.path.join("media", paths.pop()), "rb") as f:
+        assert f.read() == b"png-bytes"
+    assert len(generation_flight) == 0
+
+
+def test_singleflight_shares_failures_and_forgets_settled_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+        )
+        # Settled: the next call starts over
+        again = await asyncio.gather(flight.do("key", fail), return_exceptions=True)
+        return results + again
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 2
+    assert flight.stats() == {"in_flight": 0, "calls": 2, "shared": 2}
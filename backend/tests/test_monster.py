@@ -0,0 +1,44 @@
+from tests.helpers import register_and_login
+
+GOBLIN = {
+    "name": "Goblin",
+    "race": "Human",
+    "size": "Small",
+    "monster_type": "Humanoid",
+    "challenge_rating": 0.25,
+    "experience_points": 50,
+}
+
+
+def test_monster_crud_in_memory(api_client, repository):
+    headers = register_and_login(api_client)
+
+    response = api_client.post("/api/monsters/", json=GOBLIN, headers=headers)
+    assert response.status_code == 201
+    uid = response.json()["uid"]
+
+    response = api_client.put(
+        f"/api/monsters/{uid}", json={"challenge_rating": 0.5}, headers=headers
+    )
+    assert response.json()["challenge_rating"] == 0.5
+
+    assert api_client.delete(f"/api/monsters/{uid}", headers=headers).status_code == 204
+    assert api_client.get(f"/api/monsters/{uid}", headers=headers).status_code == 404
+    assert repository.monsters == {}
+
+
+def test_monster_conditional_get(api_client, repository):
+    headers = register_and_login(api_client)
+    uid = api_client.post("/api/monsters/", json=GOBLIN, headers=headers).json()["uid"]
+    etag = api_client.get(f"/api/monsters/{uid}", headers=headers).headers["ETag"]
+
+    response = api_client.get(
+        f"/api/monsters/{uid}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    api_client.put(f"/api/monsters/{uid}", json={"name": "Hobgoblin"}, headers=headers)
+    response = api_client.get(
+        f"/api/monsters/{uid}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,30 @@
+from core.schema import REQUIRED_SCHEMA, SchemaItem, apply_schema, find_missing_schema
+
+
+def test_find_missing_schema_reports_uninstalled_items(query_counter):
+    query_counter.results.append(
+        [
+            [["Character"], ["uid"], "UNIQUENESS"],
+            [["User"], ["email"], "NODE_PROPERTY_UNIQUENESS"],
+        ]
+    )
+    query_counter.results.append([[["Character"], ["uid"]], [["User"], ["email"]]])
+
+    missing = find_missing_schema()
+
+    assert SchemaItem("unique", "Character", ("uid",)) not in missing
+    assert SchemaItem("unique", "User", ("email",)) not in missing
+    assert SchemaItem("unique", "Monster", ("uid",)) in missing
+    assert len(missing) == len(REQUIRED_SCHEMA) - 2
+
+
+def test_apply_schema_uses_idempotent_statements(query_counter):
+    created = apply_schema()
+
+    statements = [query for query, _ in query_counter.queries[2:]]
+    assert len(statements) == len(created) == len(REQUIRED_SCHEMA)
+    assert all("IF NOT EXISTS" in statement for statement in statements)
+    assert (
+        "CREATE CONSTRAINT constraint_unique_Character_uid IF NOT EXISTS "
+        "FOR (n:Character) REQUIRE n.uid IS UNIQUE"
+    ) in statements
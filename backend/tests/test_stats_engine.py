@@ -0,0 +1,35 @@
+import random
+
+from models.character import Character
+from services.character_service import CharacterService
+from services.stats_engine import compute_stats_batch
+from tests.helpers import CHARACTER_DATA
+
+
+def random_character(rng: random.Random) -> Character:
+    abilities = ["strength", "dexterity", "constitution"]
+    abilities += ["intelligence", "wisdom", "charisma"]
+    data = {**CHARACTER_DATA, "uid": f"char-{rng.random()}"}
+    data.update({ability: rng.randint(1, 30) for ability in abilities})
+    data["saving_throws"] = {a: rng.random() < 0.3 for a in abilities}
+    data["skills"] = {
+        skill: rng.random() < 0.3 for skill in CharacterService.skill_to_ability
+    }
+    data["current_hit_points"] = rng.choice([None, rng.randint(0, 20)])
+    character = Character(**data)
+    character.level = rng.randint(1, 20)
+    character.experience = rng.choice([0, 299, 300, 64000, 354999, 355000, 999999])
+    return character
+
+
+def test_batch_matches_per_character_stats():
+    rng = random.Random(42)
+    characters = [random_character(rng) for _ in range(200)]
+
+    batch = compute_stats_batch(characters)
+
+    assert batch == [CharacterService.build_character_stats(c) for c in characters]
+
+
+def test_batch_of_no_characters_is_empty():
+    assert compute_stats_batch([]) == []
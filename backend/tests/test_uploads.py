@@ -0,0 +1,188 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException, Request
+
+from core.config import settings
+from core.uploads import receive_files
+from services.character_service import stats_cache
+from services.character_sync import character_sync
+from tests.helpers import create_character, register_and_login
+
+
+@pytest.fixture
+def media_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1024)
+    return tmp_path / "media"
+
+
+def test_upload_is_streamed_to_media(api_client, media_dir):
+    headers = register_and_login(api_client)
+    content = os.urandom(5000)
+
+    response = api_client.post(
+        "/api/upload-image/",
+        files={"file": ("portrait.png", content, "image/png")},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    path = media_dir / response.json()["image_path"]
+    assert path.read_bytes() == content
+    assert list(path.parent.glob("*.part")) == []
+
+
+def test_oversized_upload_is_rejected_without_leftovers(
+    api_client, media_dir, monkeypatch
+):
+    headers = register_and_login(api_client)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+
+    response = api_client.post(
+        "/api/upload-image/",
+        files={"file": ("huge.png", b"x" * 5000, "image/png")},
+        headers=headers,
+    )
+
+    assert response.status_code == 413
+    assert list((media_dir / "uploads").iterdir()) == []
+
+
+def test_avatar_replaces_previous_file(api_client, repository, media_dir):
+    headers = register_and_login(api_client)
+
+    for name, content in (("a.png", b"first"), ("b.jpg", b"second")):
+        response = api_client.patch(
+            "/api/users/me/avatar",
+            files={"avatar": (name, content, "image/png")},
+            headers=headers,
+        )
+        assert response.status_code == 200
+
+    files = sorted(p.name for p in (media_dir / "users").iterdir())
+    assert len(files) == 1 and files[0].endswith("_avatar.jpg")
+    assert (media_dir / "users" / files[0]).read_bytes() == b"second"
+
+
+def upload_request(body_chunks, headers):
+    """A request whose body arrives in body_chunks; records what was read"""
+    received = []
+
+    async def receive():
+        chunk = body_chunks[len(received)]
+        received.append(chunk)
+        return {
+            "type": "http.request",
+            "body": chunk,
+            "more_body": len(received) < len(body_chunks),
+        }
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    return Request(scope, receive), received
+
+
+def test_oversized_content_length_is_rejected_before_the_body_is_read(
+    media_dir, monkeypatch
+):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+    request, received = upload_request(
+        [b"x" * 1024] * 100,
+        {
+            "Content-Type": "multipart/form-data; boundary=b",
+            "Content-Length": str(100 * 1024),
+        },
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(receive_files(request, lambda *part: "media/f", fields=("file",)))
+
+    assert error.value.status_code == 413
+    assert received == []
+
+
+def test_body_without_content_length_is_cut_off_at_the_limit(media_dir, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+    head = (
+        b"--b\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+        b"Content-Type: image/png\r\n\r\n"
+    )
+    request, received = upload_request(
+        [head] + [b"x" * 1024] * 100,
+        {"Content-Type": "multipart/form-data; boundary=b"},
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            receive_files(request, lambda *part: "media/a.png", fields=("file",))
+        )
+
+    assert error.value.status_code == 413
+    assert len(received) == 6
+    assert list(media_dir.iterdir()) == []
+
+
+def test_character_images_update_invalidate_stats_and_publish(
+    api_client, repository, media_dir, monkeypatch
+):
+    headers = register_and_login(api_client)
+    uid = create_character(api_client, headers)
+    etag = api_client.get(f"/api/characters/{uid}/stats", headers=headers).headers[
+        "ETag"
+    ]
+    cached = len(stats_cache)
+    published = []
+
+    async def publish(character):
+        published.append(character.to_dict())
+
+    monkeypatch.setattr(character_sync, "publish", publish)
+
+    response = api_client.patch(
+        f"/api/characters/{uid}/images",
+        files={
+            "image": ("full.png", b"image-bytes", "image/png"),
+            "icon": ("small.png", b"icon-bytes", "image/png"),
+        },
+        headers={**headers, "If-Match": etag},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (media_dir / body["image_path"]).read_bytes() == b"image-bytes"
+    assert (media_dir / body["icon_path"]).read_bytes() == b"icon-bytes"
+    assert body["version"] == 1
+    assert repository.characters[uid].icon_path == body["icon_path"]
+    assert [state["icon_path"] for state in published] == [body["icon_path"]]
+    assert len(stats_cache) == cached - 1
+    stats = api_client.get(f"/api/characters/{uid}/stats", headers=headers).json()
+    assert stats["icon"] == body["icon_path"]
+
+    # A stale ETag is refused and the files it uploaded are removed again
+    response = api_client.patch(
+        f"/api/characters/{uid}/images",
+        files={"icon": ("other.png", b"other", "image/png")},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 409
+    assert len(published) == 1
+    assert len(list((media_dir / "characters").iterdir())) == 2
+
+    # A committed replacement removes the file it replaced
+    response = api_client.patch(
+        f"/api/characters/{uid}/images",
+        files={"icon": ("other.png", b"other", "image/png")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    icon_path = response.json()["icon_path"]
+    assert not (media_dir / body["icon_path"]).exists()
+    assert (media_dir / icon_path).read_bytes() == b"other"
+    assert (media_dir / body["image_path"]).exists()
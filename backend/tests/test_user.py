@@ -0,0 +1,73 @@
+from passlib.hash import bcrypt
+
+from core.config import settings
+from services.user_service import UserService
+from schemas.user import UserUpdate
+from core.security import user_cache
+from tests.helpers import REGISTRATION, register_and_login
+
+
+def test_register_login_and_read_me(api_client, repository):
+    headers = register_and_login(api_client)
+
+    response = api_client.get("/api/auth/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == REGISTRATION["email"]
+    assert len(repository.users) == 1
+
+
+def test_register_duplicate_email_is_rejected(api_client):
+    register_and_login(api_client)
+
+    response = api_client.post("/api/auth/register", json=REGISTRATION)
+
+    assert response.status_code == 400
+
+
+def test_login_with_wrong_password_is_rejected(api_client):
+    register_and_login(api_client)
+
+    response = api_client.post(
+        "/api/auth/login",
+        json={"email": REGISTRATION["email"], "password": "wrong"},
+    )
+
+    assert response.status_code == 401
+
+
+def test_authenticated_user_is_cached_until_updated(api_client, repository):
+    headers = register_and_login(api_client)
+    api_client.get("/api/auth/me", headers=headers)
+    hits = user_cache.hits
+
+    api_client.get("/api/auth/me", headers=headers)
+    assert user_cache.hits == hits + 1
+
+    user = repository.get_user_by_email(REGISTRATION["email"])
+    UserService.update_user(user.uid, UserUpdate(username="aria-the-bold"))
+    assert user_cache.get(REGISTRATION["email"]) is None
+
+    response = api_client.get("/api/auth/me", headers=headers)
+    assert response.json()["username"] == "aria-the-bold"
+
+
+def test_login_rehashes_password_made_with_another_cost(api_client, repository):
+    register_and_login(api_client)
+    user = repository.get_user_by_email(REGISTRATION["email"])
+    # A hash from before BCRYPT_ROUNDS was changed
+    old_rounds = settings.BCRYPT_ROUNDS + 1
+    user.hashed_password = bcrypt.using(rounds=old_rounds).hash(
+        REGISTRATION["password"]
+    )
+    repository.save_user(user)
+
+    response = api_client.post(
+        "/api/auth/login",
+        json={"email": REGISTRATION["email"], "password": REGISTRATION["password"]},
+    )
+    assert response.status_code == 200
+
+    rehashed = repository.get_user_by_email(REGISTRATION["email"]).hashed_password
+    assert bcrypt.from_string(rehashed).rounds == settings.BCRYPT_ROUNDS
+    assert bcrypt.verify(REGISTRATION["password"], rehashed)
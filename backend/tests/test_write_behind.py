@@ -0,0 +1,53 @@
+import asyncio
+
+from core.write_behind import WriteBehindBuffer
+
+
+def test_flushes_when_batch_is_full():
+    batches = []
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batches.append, batch_size=3, interval=60)
+        for i in range(4):
+            buffer.add(i)
+            await asyncio.sleep(0.01)
+        assert batches == [[0, 1, 2]]
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert batches == [[0, 1, 2], [3]]
+
+
+def test_flushes_on_interval():
+    batches = []
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batches.append, batch_size=100, interval=0.02)
+        buffer.add("a")
+        await asyncio.sleep(0.1)
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert batches == [["a"]]
+
+
+def test_failed_batch_is_retried():
+    batches = []
+    failures = [RuntimeError("database unavailable")]
+
+    def sink(batch):
+        if failures:
+            raise failures.pop()
+        batches.append(batch)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(sink, batch_size=10, interval=60)
+        buffer.add(1)
+        await buffer.flush()
+        buffer.add(2)
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert batches == [[1, 2]]
+    assert buffer.failures == 1
@@ -33,6 +33,9 @@ const SKILLS = {
   survival: { stat: 'wisdom', name: 'Survival' }
 };
 const SIZE_OPTIONS = ['Tiny', 'Small', 'Medium', 'Large'];
+// Image generation jobs are polled every second for up to three minutes
+const IMAGE_JOB_POLL_MS = 1000;
+const IMAGE_JOB_MAX_POLLS = 180;
 const DEFAULT_HIT_DICE = {
   'Fighter': 'd10',
   'Wizard': 'd6',
@@ -215,18 +218,32 @@ export default function CreateCharacter() {
     }
   };
 
+  const waitForImageJob = async (jobId) => {
+    for (let attempt = 0; attempt < IMAGE_JOB_MAX_POLLS; attempt++) {
+      const { data: job } = await api.get(`/api/image-generation/jobs/${jobId}`);
+      if (job.status === 'succeeded') return job;
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.error || `Image generation ${job.status}`);
+      }
+      await new Promise(resolve => setTimeout(resolve, IMAGE_JOB_POLL_MS));
+    }
+    throw new Error('Image generation timed out');
+  };
+
   const handleGeneratePreview = async () => {
     setIsGenerating(true);
     try {
       const prompt = `A fantasy character portrait of a ${character.race} ${character.class}. 
         ${character.description || ''}`;
 
+      // Generation runs as a background job; poll it until it finishes
       const response = await api.post('/api/image-generation/generate', {
         prompt: prompt
       });
+      const job = await waitForImageJob(response.data.job_id);
 
-      if (response.data && response.data.image_path) {
-        const imagePath = response.data.image_path;
+      if (job.result && job.result.image_path) {
+        const imagePath = job.result.image_path;
         setGeneratedImage(imagePath);
         setCharacter(prev => ({
           ...prev,